@@ -0,0 +1,90 @@
+"""Micro-benchmark: HackDetection's anchor-indexed pattern match vs. a linear scan.
+
+Storage is modelled with plain lists and dicts, and the matching code mirrors
+``HackDetection._append_pattern`` / ``_match_patterns``: every pattern whose
+signature occurs in tx_data, lowest pattern_id first. The index path is timed
+on its own as well as through the size switch the contract uses.
+
+Usage: python bench_pattern_index.py
+"""
+import random
+import string
+import timeit
+from typing import Dict, List
+
+ANCHOR_LEN = 4
+
+
+class _Patterns:
+    def __init__(self, signatures: List[str]):
+        self.signatures: List[str] = []
+        self.anchor_index: Dict[str, List[int]] = {}
+        self.short_ids: List[int] = []
+        for sig in signatures:
+            self.add(sig)
+
+    def add(self, signature: str) -> None:
+        pattern_id = len(self.signatures)
+        self.signatures.append(signature)
+        if len(signature) < ANCHOR_LEN:
+            self.short_ids.append(pattern_id)
+            return
+        anchor, fewest = signature[:ANCHOR_LEN], -1
+        for i in range(len(signature) - ANCHOR_LEN + 1):
+            gram = signature[i:i + ANCHOR_LEN]
+            count = len(self.anchor_index.get(gram, ()))
+            if fewest < 0 or count < fewest:
+                anchor, fewest = gram, count
+                if count == 0:
+                    break
+        self.anchor_index.setdefault(anchor, []).append(pattern_id)
+
+    def match_linear(self, tx_data: str) -> List[int]:
+        return [pid for pid, signature in enumerate(self.signatures) if signature in tx_data]
+
+    def match_indexed(self, tx_data: str) -> List[int]:
+        matched = set()
+        for pid in self.short_ids:
+            if self.signatures[pid] in tx_data:
+                matched.add(pid)
+        anchors = {tx_data[i:i + ANCHOR_LEN] for i in range(len(tx_data) - ANCHOR_LEN + 1)}
+        for anchor in anchors:
+            for pid in self.anchor_index.get(anchor, ()):
+                if self.signatures[pid] in tx_data:
+                    matched.add(pid)
+        return sorted(matched)
+
+    def match(self, tx_data: str) -> List[int]:
+        if len(self.signatures) <= len(tx_data):
+            return self.match_linear(tx_data)
+        return self.match_indexed(tx_data)
+
+
+def _signatures(n: int) -> List[str]:
+    rng = random.Random(7)
+    words = ["flash", "loan", "reentrancy", "oracle", "bridge", "drain", "swap", "mint", "proxy", "upgrade"]
+    sigs = []
+    while len(sigs) < n:
+        tail = "".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(rng.randint(4, 16)))
+        sigs.append(f"{rng.choice(words)}_{tail}")
+    return sigs
+
+
+def main() -> None:
+    rng = random.Random(11)
+    tx_data = "transfer(0x" + "".join(rng.choice("0123456789abcdef") for _ in range(480)) + ") flash loan swap via router"
+    number = 200
+    for size in (10, 1000, 10000):
+        patterns = _Patterns(_signatures(size))
+        assert patterns.match_indexed(tx_data) == patterns.match_linear(tx_data)
+        linear = timeit.timeit(lambda: patterns.match_linear(tx_data), number=number)
+        indexed = timeit.timeit(lambda: patterns.match_indexed(tx_data), number=number)
+        chosen = timeit.timeit(lambda: patterns.match(tx_data), number=number)
+        print(
+            f"patterns={size:>6}  linear={linear / number * 1e6:9.1f}us  indexed={indexed / number * 1e6:9.1f}us  "
+            f"contract={chosen / number * 1e6:9.1f}us  (tx_data={len(tx_data)} chars)"
+        )
+
+
+if __name__ == "__main__":
+    main()
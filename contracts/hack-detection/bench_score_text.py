@@ -0,0 +1,66 @@
+"""Micro-benchmark: compiled KeywordMatcher vs. the original per-keyword substring loop.
+
+The loop is a plain substring test, so it is both cheaper and less precise at
+small keyword counts. With the shipped KEYWORDS (17), the matcher is about 5x
+slower on alert-like text (roughly 12us vs 2us) and on par for headlines
+without keywords; it pays off only for much larger tables (8x faster at 1k).
+Both an alert-like headline and an ordinary one without keywords are timed.
+
+Usage: python bench_score_text.py
+"""
+import random
+import string
+import timeit
+from typing import Dict, List, Tuple
+
+from keyword_matcher import KeywordMatcher
+from monitor import KEYWORDS
+
+
+def _legacy_score_text(text: str, keywords: Dict[str, int]) -> Tuple[int, List[str]]:
+    t = text.lower()
+    score = 0
+    hits: List[str] = []
+    for k, v in keywords.items():
+        if k in t:
+            score += v
+            hits.append(k)
+    return min(score, 100), hits
+
+
+def _synthetic_keywords(n: int) -> Dict[str, int]:
+    rng = random.Random(7)
+    words = dict(KEYWORDS)
+    while len(words) < n:
+        size = rng.randint(4, 12)
+        words["".join(rng.choice(string.ascii_lowercase) for _ in range(size))] = rng.randint(5, 30)
+    return words
+
+
+def main() -> None:
+    texts = {
+        "alert": (
+            "Bridge protocol hacked: attackers drained $40M after an oracle exploit, "
+            "critical vulnerability incident confirmed https://news.example.com/defi/bridge-hack "
+            "Mon, 06 Oct 2025 12:00:00 GMT"
+        ),
+        "plain": (
+            "Bitcoin price steadies as ETF inflows slow https://news.example.com/markets/btc-etf "
+            "Mon, 06 Oct 2025 12:00:00 GMT"
+        ),
+    }
+    number = 2000
+    for size in (len(KEYWORDS), 1000, 5000):
+        keywords = _synthetic_keywords(size)
+        matcher = KeywordMatcher(keywords)
+        for name, text in texts.items():
+            legacy = timeit.timeit(lambda: _legacy_score_text(text, keywords), number=number)
+            compiled = timeit.timeit(lambda: matcher.score(text), number=number)
+            print(
+                f"keywords={size:>5}  text={name:<5}  legacy={legacy / number * 1e6:8.1f}us  "
+                f"compiled={compiled / number * 1e6:8.1f}us  speedup={legacy / compiled:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
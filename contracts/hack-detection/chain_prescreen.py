@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# 4-byte selectors that show up in most protocol exploits or takeovers.
+SUSPICIOUS_SELECTORS: Dict[str, Tuple[str, int]] = {
+    "0xab9c4b5d": ("aave_flash_loan", 30),
+    "0x5cffe9de": ("erc3156_flash_loan", 30),
+    "0x490e6cbc": ("uniswap_v3_flash", 30),
+    "0x5c38449e": ("balancer_flash_loan", 30),
+    "0x3659cfe6": ("proxy_upgrade", 40),
+    "0x4f1ef286": ("proxy_upgrade", 40),
+    "0xf2fde38b": ("ownership_transfer", 40),
+}
+
+
+def address_topic(address: str) -> str:
+    """Left-pad an address to a 32-byte log topic."""
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+class ChainPrescreener:
+    """Cheap local filter over raw EVM blocks and logs.
+
+    Only transactions that call a protected contract, make one emit an event,
+    or move tokens out of one are scored. Scoring is a few dict and set lookups
+    per transaction, so a block is screened in well under a millisecond.
+    """
+
+    def __init__(
+        self,
+        protected: Iterable[str],
+        threshold: int = 40,
+        large_value_wei: int = 100 * 10**18,
+        outflow_burst: int = 5,
+        event_burst: int = 20,
+    ):
+        self.protected = {a.lower() for a in protected if a}
+        self.protected_topics = {address_topic(a) for a in self.protected}
+        self.threshold = threshold
+        self.large_value_wei = large_value_wei
+        self.outflow_burst = outflow_burst
+        self.event_burst = event_burst
+
+    def log_filters(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """``eth_getLogs`` filters for events emitted by, or transfers out of, protected contracts."""
+        span = {"fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        return [
+            dict(span, address=sorted(self.protected)),
+            dict(span, topics=[TRANSFER_TOPIC, sorted(self.protected_topics)]),
+        ]
+
+    def screen(self, blocks: List[Dict[str, Any]], logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the suspicious transactions in ``blocks`` (full-transaction objects)."""
+        logs_by_tx: Dict[str, List[Dict[str, Any]]] = {}
+        for log in logs:
+            tx_hash = (log.get("transactionHash") or "").lower()
+            if tx_hash:
+                logs_by_tx.setdefault(tx_hash, []).append(log)
+
+        flagged = []
+        for block in blocks:
+            if not block:
+                continue
+            block_number = int(block.get("number") or "0x0", 16)
+            for tx in block.get("transactions", []):
+                if not isinstance(tx, dict):
+                    continue
+                tx_hash = (tx.get("hash") or "").lower()
+                to = (tx.get("to") or "").lower()
+                tx_logs = logs_by_tx.get(tx_hash, [])
+                if to not in self.protected and not tx_logs:
+                    continue
+                score, reasons = self._score(tx, to, tx_logs)
+                if score >= self.threshold:
+                    flagged.append(
+                        {
+                            "hash": tx_hash,
+                            "block": block_number,
+                            "from": (tx.get("from") or "").lower(),
+                            "to": to,
+                            "selector": (tx.get("input") or "0x")[:10],
+                            "value_wei": int(tx.get("value") or "0x0", 16),
+                            "score": min(score, 100),
+                            "reasons": reasons,
+                        }
+                    )
+        return flagged
+
+    def _score(self, tx: Dict[str, Any], to: str, tx_logs: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        score = 0
+        reasons: List[str] = []
+        selector = (tx.get("input") or "0x")[:10].lower()
+        if selector in SUSPICIOUS_SELECTORS:
+            reason, weight = SUSPICIOUS_SELECTORS[selector]
+            score += weight
+            reasons.append(reason)
+        if not to:
+            score += 35
+            reasons.append("contract_creation_touches_protocol")
+        elif to not in self.protected:
+            score += 15
+            reasons.append("indirect_protocol_call")
+
+        outflows = 0
+        events = 0
+        for log in tx_logs:
+            topics = log.get("topics") or []
+            if (log.get("address") or "").lower() in self.protected:
+                events += 1
+            if len(topics) > 1 and topics[0] == TRANSFER_TOPIC and topics[1].lower() in self.protected_topics:
+                outflows += 1
+        if outflows >= self.outflow_burst:
+            score += 30
+            reasons.append("protocol_outflow_burst")
+        if events >= self.event_burst:
+            score += 10
+            reasons.append("protocol_event_burst")
+        if int(tx.get("value") or "0x0", 16) >= self.large_value_wei:
+            score += 15
+            reasons.append("large_value")
+        return score, reasons
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict
+
+
+class FeedCache:
+    """Per-URL HTTP validators (ETag / Last-Modified) plus a digest of the last body seen.
+
+    Lets pollers send conditional requests and skip parsing when a feed has not changed.
+    The cache is kept in memory and persisted with ``save()``. It is safe to
+    share between fetch threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, str]] = self._load()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            entry = dict(self.entries.get(url) or {})
+        headers: Dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url: str) -> None:
+        """Record a 304 response."""
+        with self._lock:
+            self.hits += 1
+
+    def update(self, url: str, body: bytes, etag: str = "", last_modified: str = "") -> bool:
+        """Store validators for ``url``; return True if the body differs from the cached one."""
+        return self.store(url, hashlib.sha256(body).hexdigest(), etag, last_modified)
+
+    def store(self, url: str, digest: str, etag: str = "", last_modified: str = "") -> bool:
+        """Like ``update`` for callers that hashed the body themselves.
+
+        An empty ``digest`` (body not fully read) refreshes the validators only and
+        never counts as unchanged.
+        """
+        changed = self.changed(url, digest)
+        self.remember(url, digest, etag, last_modified)
+        return changed
+
+    def changed(self, url: str, digest: str) -> bool:
+        """Count and return whether ``digest`` differs from the cached one, without storing it."""
+        with self._lock:
+            previous = self.entries.get(url) or {}
+            if digest and previous.get("digest") == digest:
+                self.hits += 1
+                return False
+            self.misses += 1
+            return True
+
+    def remember(self, url: str, digest: str, etag: str = "", last_modified: str = "") -> None:
+        """Store validators and digest for ``url`` without touching the hit/miss counters."""
+        with self._lock:
+            self.entries[url] = {
+                "etag": etag or "",
+                "last_modified": last_modified or "",
+                "digest": digest,
+            }
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            entries = dict(self.entries)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
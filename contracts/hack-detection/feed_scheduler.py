@@ -0,0 +1,78 @@
+import re
+import time
+from typing import Dict, List, Optional
+
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def max_age_seconds(cache_control: str) -> Optional[int]:
+    m = _MAX_AGE_RE.search(cache_control or "")
+    return int(m.group(1)) if m else None
+
+
+class FeedScheduler:
+    """Per-feed adaptive polling intervals.
+
+    A feed that returned new items is polled again after ``base_interval``; one
+    that produced ``burst_alerts`` or more alerts in a single poll drops to
+    ``min_interval``; one that was unchanged or failed backs off by ``backoff``
+    up to ``max_interval``. A server hint (RSS ``<ttl>`` or ``Cache-Control:
+    max-age``) is honored as a lower bound, capped at ``max_interval``.
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 1.5,
+        burst_alerts: int = 2,
+    ):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.burst_alerts = burst_alerts
+        self.feeds: Dict[str, Dict[str, float]] = {}
+
+    def _feed(self, url: str) -> Dict[str, float]:
+        feed = self.feeds.get(url)
+        if feed is None:
+            feed = self.feeds[url] = {"interval": self.base_interval, "next_due": 0.0, "hint": 0.0}
+        return feed
+
+    def due(self, sources: List[str], now: Optional[float] = None) -> List[str]:
+        """Return feeds due for polling, provisionally rescheduling them at their current interval."""
+        now = time.time() if now is None else now
+        due = []
+        for url in sources:
+            feed = self._feed(url)
+            if feed["next_due"] <= now:
+                feed["next_due"] = now + feed["interval"]
+                due.append(url)
+        return due
+
+    def set_hint(self, url: str, seconds: float) -> None:
+        self._feed(url)["hint"] = max(0.0, float(seconds))
+
+    def record(self, url: str, new_items: int = 0, alerts: int = 0, failed: bool = False, now: Optional[float] = None) -> float:
+        """Update ``url``'s interval from the outcome of a poll; return the new interval."""
+        now = time.time() if now is None else now
+        feed = self._feed(url)
+        if failed or new_items <= 0:
+            interval = min(feed["interval"] * self.backoff, self.max_interval)
+        elif alerts >= self.burst_alerts:
+            interval = self.min_interval
+        else:
+            interval = self.base_interval
+        interval = max(interval, min(feed["hint"], self.max_interval))
+        feed["interval"] = interval
+        feed["next_due"] = now + interval
+        return interval
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        if not self.feeds:
+            return self.base_interval
+        return max(1.0, min(f["next_due"] for f in self.feeds.values()) - now)
@@ -1,6 +1,8 @@
 # { "Depends": "py-genlayer:test" }
 
+import hashlib
 import json
+import re
 from dataclasses import dataclass
 from genlayer import *
 from genlayer.gl.vm import UserError
@@ -63,6 +65,58 @@ class HackDetection(gl.Contract):
     SECURITY_ROLE = "security_officer"
     USER_ROLE = "user"
 
+    # Signatures are indexed by one PATTERN_ANCHOR_LEN-character substring.
+    PATTERN_ANCHOR_LEN = 4
+    # Graded AI verdicts, lowest first.
+    AI_GRADES = ["NONE", "LOW", "MEDIUM", "HIGH"]
+    GRADE_RE = re.compile(r"\b(?:" + "|".join(AI_GRADES) + r")\b")
+
+    # Deterministic risk scoring (0-100). One pattern hit reaches the default
+    # auto-pause level; risk terms plus origin history alone cannot.
+    PATTERN_HIT_WEIGHT = 75
+    RISK_TERMS = {
+        "exploit": 20,
+        "drained": 20,
+        "reentrancy": 25,
+        "flash": 15,
+        "flashloan": 15,
+        "delegatecall": 15,
+        "selfdestruct": 20,
+        "proxy_upgrade": 25,
+        "ownership_transfer": 25,
+        "outflow_burst": 20,
+        "large_value": 10,
+        "hack": 15,
+        "attack": 10,
+        "rugpull": 20,
+        "vulnerability": 15,
+    }
+    RISK_TERMS_MAX = 40
+    # Terms match whole words, with "_" as a separator ("aave_flash_loan") and
+    # common inflections allowed, so "hack" skips "hackathon" but counts "hackers".
+    RISK_TERMS_RE = re.compile(
+        r"(?<![a-z0-9])("
+        + "|".join(sorted((re.escape(t) for t in RISK_TERMS), key=len, reverse=True))
+        + r")(?:s|es|ed|er|ers|ing)?(?![a-z0-9])"
+    )
+    # Origin history: flagged analyses of the transaction's originator count
+    # ORIGIN_FLAG_WEIGHT each, up to ORIGIN_HISTORY_MAX. A count lapses after
+    # ORIGIN_HISTORY_WINDOW seconds without a new flag, and unpause resets all.
+    ORIGIN_FLAG_WEIGHT = 10
+    ORIGIN_HISTORY_MAX = 30
+    ORIGIN_HISTORY_WINDOW = 7 * 86400
+
+    # Most transactions accepted by one analyze_transactions call.
+    ANALYZE_BATCH_MAX = 200
+    # Transactions graded per consensus round in a batch. Validators must agree
+    # on every grade of a round, so a disagreement only costs this many items.
+    AI_GRADE_CHUNK = 10
+    # Most matched pattern signatures shown to validators per transaction.
+    AI_PROMPT_PATTERNS = 10
+
+    # Verdicts for this many distinct payloads are kept, oldest evicted first.
+    VERDICT_CACHE_SIZE = 1024
+
     # Core state
     is_paused: bool
     admin: Address  # legacy, for backward compatibility
@@ -71,7 +125,21 @@ class HackDetection(gl.Contract):
     blacklisted: TreeMap[Address, bool]
     security_events: DynArray[SecurityEvent]
     attack_patterns: DynArray[AttackPattern]
+    # Anchor index over attack_patterns: signature substring -> pattern ids.
+    # Signatures shorter than the anchor are kept in short_pattern_ids.
+    pattern_anchor_index: TreeMap[str, DynArray[u256]]
+    short_pattern_ids: DynArray[u256]
+    # Bumped on every pattern change; cached verdicts from older versions are stale.
+    pattern_version: u256
+    # sha256(tx_data) -> JSON verdict, with verdict_cache_keys as the eviction ring.
+    verdict_cache: TreeMap[str, str]
+    verdict_cache_keys: TreeMap[u256, str]
+    verdict_cache_next: u256
     tx_risk_scores: TreeMap[str, u8]
+    # Originator -> JSON {count, last, epoch} of analyses flagged as threats.
+    origin_flags: TreeMap[str, str]
+    # Bumped by unpause; entries from an older epoch count as empty.
+    history_epoch: u256
     tx_analysis: TreeMap[str, str]
     recent_hashes: TreeMap[u256, str]
     recent_index: u256
@@ -93,14 +161,14 @@ class HackDetection(gl.Contract):
         WebhookNotification(message=payload)
 
     def _risk_level(self, score: int) -> str:
-        if score >= 71:
+        if score >= int(self.auto_pause_level_min):
             return "HIGH"
-        if score >= 31:
+        if score >= int(self.notify_level_min):
             return "MEDIUM"
         return "LOW"
 
-    def _analysis_message(self, threat: bool, score: int) -> str:
-        level = self._risk_level(score)
+    def _analysis_message(self, threat: bool, score: int, level: str = "") -> str:
+        level = level or self._risk_level(score)
         if not threat:
             return "NO THREAT DETECTED."
         if level == "HIGH":
@@ -109,8 +177,8 @@ class HackDetection(gl.Contract):
             return "MEDIUM LEVEL THREAT DETECTED."
         return "LOW LEVEL THREAT DETECTED."
 
-    def _analysis_action(self, threat: bool, score: int) -> str:
-        level = self._risk_level(score)
+    def _analysis_action(self, threat: bool, score: int, level: str = "") -> str:
+        level = level or self._risk_level(score)
         if not threat:
             return "No action needed."
         if level == "HIGH":
@@ -145,6 +213,9 @@ class HackDetection(gl.Contract):
         self.last_pattern_fetch = ""
         self.last_pattern_added = ""
         self.recent_index = u256(0)
+        self.pattern_version = u256(0)
+        self.verdict_cache_next = u256(0)
+        self.history_epoch = u256(0)
 
     def _emit_protocol_pause_signal(self, protocol: Address, reason: str, tx_hash: str, risk_score: int):
         payload = json.dumps({
@@ -204,6 +275,20 @@ class HackDetection(gl.Contract):
             return "FALSE"
         return "FALSE"
 
+    def _nondet_grade_token(self, prompt: str) -> str:
+        # Return only one of AI_GRADES to stabilize validator outcomes; the first
+        # whole-word grade wins, so "BELOW" or "ALLOWED" never reads as LOW.
+        cleaned = gl.nondet.exec_prompt(prompt).strip().upper()
+        found = self.GRADE_RE.search(cleaned)
+        return found.group(0) if found else "NONE"
+
+    def _nondet_grade_list(self, prompt: str, count: int) -> str:
+        # Return exactly count comma-separated AI_GRADES; missing items count as NONE
+        cleaned = gl.nondet.exec_prompt(prompt).strip().upper()
+        grades = self.GRADE_RE.findall(cleaned)[:count]
+        grades += ["NONE"] * (count - len(grades))
+        return ",".join(grades)
+
     def _require_role(self, role: str):
         sender = gl.message.sender_address
         if self.roles.get(sender, "") != role and not self.admins.get(sender, False):
@@ -255,100 +340,282 @@ class HackDetection(gl.Contract):
         self._emit_webhook(self.admin, f"Pattern fetch requested from {source_url}", "pattern_fetch", "")
 
     @gl.public.write
-    def analyze_transaction(self, tx_data: str, tx_hash: str) -> None:
-        """Real-time detection: AI + pattern matching
+    def analyze_transaction(self, tx_data: str, tx_hash: str, origin: str = "") -> None:
+        """Real-time detection: deterministic scoring, AI consensus only when uncertain
         Uses gl.message.sender_address as the caller (prevents spoofing).
+        origin is the analyzed transaction's originator (e.g. its from address),
+        whose earlier flagged analyses raise the score; empty means unknown.
         """
         sender = gl.message.sender_address
         if self.is_paused:
             raise UserError("Contract is paused")
-        # 1. Pattern match
-        threat_resolved = False
-        for pattern in self.attack_patterns:
-            if pattern.signature in tx_data:
-                self._record_event("pattern_match", tx_hash, 90, f"Matched: {pattern.description}", sender)
-                self._trigger_circuit_breaker(sender, tx_hash, 90)
-                self._notify(sender, f"Abnormal activity detected: Pattern match ({pattern.description}) on tx {tx_hash}")
-                self._notify(self.admin, f"Alert: Pattern match detected for user {sender} on tx {tx_hash}")
-                self._emit_webhook(sender, f"Abnormal activity detected: Pattern match ({pattern.description})", "pattern_match", tx_hash)
-                self._emit_webhook(self.admin, f"Alert: Pattern match detected for user {sender}", "pattern_match", tx_hash)
-                self.tx_analysis[tx_hash] = json.dumps({
-                    "threat": True,
-                    "risk_score": 90,
-                    "risk_level": "HIGH",
-                    "reason": "Pattern match",
-                    "pattern": pattern.description,
-                    "message": "HIGH LEVEL THREAT DETECTED. Known attack pattern matched."
-                })
-                threat_resolved = True
-                break
-        if not threat_resolved:
-            # 2. AI consensus via Equivalence Principle (platform validators)
-            attack_patterns = list(self.attack_patterns)
-            _nondet_bool_token = self._nondet_bool_token
-            prompt = f"""SYSTEM: You are a security classifier. Output ONLY a single token: TRUE or FALSE.
-Return TRUE only if the transaction is clearly malicious or strongly indicative of a hack.
-If uncertain, return FALSE.
-Data: {tx_data}
-Known patterns: {[p.signature for p in attack_patterns]}
-OUTPUT: TRUE or FALSE"""
-            vote_token = gl.eq_principle.strict_eq(lambda p=prompt, f=_nondet_bool_token: f(p))
-            risk_score = 80 if vote_token == "TRUE" else 20
-            self.tx_risk_scores[tx_hash] = risk_score
-            if vote_token == "TRUE":
-                self._record_event("ai_detected", tx_hash, int(risk_score), "AI consensus", sender)
-                self._trigger_circuit_breaker(sender, tx_hash, int(risk_score))
-                self._notify(sender, f"Abnormal activity detected: AI consensus flagged your tx {tx_hash}")
-                self._notify(self.admin, f"Alert: AI consensus flagged user {sender} on tx {tx_hash}")
-                self._emit_webhook(sender, f"Abnormal activity detected: AI consensus flagged your tx", "ai_detected", tx_hash)
-                self._emit_webhook(self.admin, f"Alert: AI consensus flagged user {sender}", "ai_detected", tx_hash)
-                self.tx_analysis[tx_hash] = json.dumps({
-                    "threat": True,
-                    "risk_score": int(risk_score),
-                    "risk_level": self._risk_level(int(risk_score)),
-                    "reason": "AI consensus",
-                    "message": self._analysis_message(True, int(risk_score)),
-                    "action": self._analysis_action(True, int(risk_score))
-                })
-                threat_resolved = True
-            if not threat_resolved:
-                # 3. Proactive prediction (single-token)
-                pred = self._predict_attack(tx_data)
-                if pred["likely"]:
-                    self._record_event("predicted_threat", tx_hash, int(pred["score"]), pred["reason"], sender)
-                    self._notify(sender, f"Abnormal activity predicted on tx {tx_hash}")
-                    self._notify(self.admin, f"Alert: Predicted threat for user {sender} on tx {tx_hash}")
-                    self._emit_webhook(sender, "Abnormal activity predicted", "predicted_threat", tx_hash)
-                    self._emit_webhook(self.admin, f"Alert: Predicted threat for user {sender}", "predicted_threat", tx_hash)
-                    self.tx_analysis[tx_hash] = json.dumps({
-                        "threat": True,
-                        "risk_score": int(pred["score"]),
-                        "risk_level": self._risk_level(int(pred["score"])),
-                        "reason": "ai_bool",
-                        "message": self._analysis_message(True, int(pred["score"])),
-                        "action": self._analysis_action(True, int(pred["score"]))
-                    })
-                    threat_resolved = True
-            if not threat_resolved:
-                self.tx_analysis[tx_hash] = json.dumps({
-                    "threat": False,
-                    "risk_score": int(risk_score),
-                    "risk_level": self._risk_level(int(risk_score)),
-                    "message": self._analysis_message(False, int(risk_score)),
-                    "action": self._analysis_action(False, int(risk_score))
-                })
+        # Replayed payloads (monitor retries, the same exploit calldata against
+        # many victims) reuse the stored verdict instead of re-running consensus.
+        digest = self._payload_digest(tx_data)
+        verdict = self._cached_verdict(digest)
+        fresh = verdict is None
+        if fresh:
+            verdict = self._score_payload(tx_data)
+        risk_score = self._risk_score(verdict, self._origin_history(origin))
+        if self._needs_ai(verdict, risk_score):
+            verdict["grade"] = self._ai_grade(tx_data)
+            fresh = True
+        if fresh:
+            self._store_verdict(digest, verdict)
+        self._apply_verdict(self._decide(verdict, risk_score), sender, tx_hash, origin=origin)
         # Record recent analyses for dashboard
         self._append_recent(tx_hash)
 
-    def _predict_attack(self, tx_data: str) -> dict:
-        """Forecast attack likelihood (deterministic single-token)"""
-        _nondet_bool_token = self._nondet_bool_token
-        prompt = f"""SYSTEM: Output ONLY a single token: TRUE or FALSE.
-Return TRUE only if clearly malicious. If uncertain, return FALSE.
+    @gl.public.write
+    def analyze_transactions(self, items: list[list[str]]) -> None:
+        """Analyze many [tx_hash, tx_data] or [tx_hash, tx_data, origin] items in one transaction.
+
+        Payloads are scored deterministically; those in the uncertain band are
+        graded in a few AI consensus rounds. The circuit breaker fires at most once.
+        """
+        sender = gl.message.sender_address
+        if self.is_paused:
+            raise UserError("Contract is paused")
+        if len(items) > self.ANALYZE_BATCH_MAX:
+            raise UserError(f"At most {self.ANALYZE_BATCH_MAX} transactions per batch")
+        for item in items:
+            if len(item) not in (2, 3):
+                raise UserError("Each item must be [tx_hash, tx_data] or [tx_hash, tx_data, origin]")
+        origins = [item[2] if len(item) == 3 else "" for item in items]
+        digests = [self._payload_digest(item[1]) for item in items]
+        # History as of the start of the batch, so every item sees the same state.
+        histories = {origin: self._origin_history(origin) for origin in origins}
+        # Identical payloads in the batch are scored once.
+        verdicts = {}
+        fresh = []
+        for item, digest in zip(items, digests):
+            if digest in verdicts:
+                continue
+            verdict = self._cached_verdict(digest)
+            if verdict is None:
+                verdict = self._score_payload(item[1])
+                fresh.append(digest)
+            verdicts[digest] = verdict
+        scores = [self._risk_score(verdicts[d], histories[o]) for d, o in zip(digests, origins)]
+        pending = []
+        pending_data = []
+        for item, digest, score in zip(items, digests, scores):
+            if digest not in pending and self._needs_ai(verdicts[digest], score):
+                pending.append(digest)
+                pending_data.append(item[1])
+        if len(pending) > 0:
+            for digest, grade in zip(pending, self._ai_grades(pending_data)):
+                verdicts[digest]["grade"] = grade
+                if digest not in fresh:
+                    fresh.append(digest)
+        for digest in fresh:
+            self._store_verdict(digest, verdicts[digest])
+        tripped = False
+        for item, digest, score, origin in zip(items, digests, scores, origins):
+            decision = self._decide(verdicts[digest], score)
+            if self._apply_verdict(decision, sender, item[0], trip_breaker=not tripped, origin=origin):
+                tripped = True
+            self._append_recent(item[0])
+
+    def _payload_digest(self, tx_data: str) -> str:
+        return hashlib.sha256(tx_data.encode("utf-8")).hexdigest()
+
+    def _score_payload(self, tx_data: str) -> dict:
+        """Sender-independent part of the risk score: weighted pattern hits and risk terms."""
+        matched = self._match_patterns(tx_data)
+        score = min(len(matched) * self.PATTERN_HIT_WEIGHT, 100)
+        # Each term counts once however often it occurs.
+        found = set(self.RISK_TERMS_RE.findall(tx_data.lower()))
+        terms = 0
+        for term in found:
+            terms += self.RISK_TERMS[term]
+        score += min(terms, self.RISK_TERMS_MAX)
+        verdict = {"hits": len(matched), "score": min(score, 100)}
+        if len(matched) > 0:
+            verdict["pattern"] = self.attack_patterns[matched[0]].description
+        return verdict
+
+    def _origin_flag_count(self, origin: str) -> int:
+        raw = self.origin_flags.get(origin, "") if origin != "" else ""
+        if raw == "":
+            return 0
+        entry = json.loads(raw)
+        if int(entry["epoch"]) != int(self.history_epoch):
+            return 0
+        now = self._get_timestamp()
+        if now > 0 and now - int(entry["last"]) > self.ORIGIN_HISTORY_WINDOW:
+            return 0
+        return int(entry["count"])
+
+    def _origin_history(self, origin: str) -> int:
+        origin = origin.strip().lower()
+        return min(self._origin_flag_count(origin) * self.ORIGIN_FLAG_WEIGHT, self.ORIGIN_HISTORY_MAX)
+
+    def _flag_origin(self, origin: str):
+        origin = origin.strip().lower()
+        if origin == "":
+            return
+        self.origin_flags[origin] = json.dumps({
+            "count": self._origin_flag_count(origin) + 1,
+            "last": self._get_timestamp(),
+            "epoch": int(self.history_epoch),
+        })
+
+    def _risk_score(self, verdict: dict, history: int) -> int:
+        return min(int(verdict["score"]) + history, 100)
+
+    def _needs_ai(self, verdict: dict, risk_score: int) -> bool:
+        # Only the band between the two thresholds is uncertain enough for validators.
+        in_band = int(self.notify_level_min) <= risk_score < int(self.auto_pause_level_min)
+        return in_band and "grade" not in verdict
+
+    def _decide(self, verdict: dict, risk_score: int) -> dict:
+        """Turn a verdict and the computed score into an outcome.
+
+        The score is always the deterministic one, and only a score at or above
+        auto_pause_level_min pauses. In the band, validators can escalate a
+        transaction to an ai_detected alert or clear it, but not pause on it.
+        """
+        notify_min = int(self.notify_level_min)
+        pause_min = int(self.auto_pause_level_min)
+        if risk_score >= pause_min:
+            if int(verdict["hits"]) > 0:
+                return {"kind": "pattern_match", "score": risk_score, "pause": True, "pattern": verdict["pattern"]}
+            return {"kind": "risk_detected", "score": risk_score, "pause": True}
+        if risk_score < notify_min:
+            return {"kind": "none", "score": risk_score, "pause": False}
+        grade = verdict.get("grade", "NONE")
+        if grade == "HIGH":
+            return {"kind": "ai_detected", "score": risk_score, "pause": False}
+        if grade == "MEDIUM":
+            return {"kind": "predicted_threat", "score": risk_score, "pause": False, "reason": "ai_grade"}
+        # Cleared by validators.
+        return {"kind": "none", "score": risk_score, "pause": False, "level": "LOW"}
+
+    def _relevant_patterns(self, tx_data: str) -> list:
+        # Only patterns that occur in tx_data are worth the validators' attention;
+        # listing every stored signature would grow the prompt with the pattern set.
+        matched = self._match_patterns(tx_data)[:self.AI_PROMPT_PATTERNS]
+        return [self.attack_patterns[pid].signature for pid in matched]
+
+    def _ai_grade(self, tx_data: str) -> str:
+        _nondet_grade_token = self._nondet_grade_token
+        prompt = f"""SYSTEM: You are a security classifier. Output ONLY a single token: NONE, LOW, MEDIUM or HIGH.
+HIGH: the transaction is clearly malicious or strongly indicative of a hack.
+MEDIUM: the transaction is likely part of an attack but not clearly malicious.
+LOW: unusual but probably benign.
+NONE: no sign of an attack.
+If uncertain between two grades, return the lower one.
 Data: {tx_data}
-OUTPUT: TRUE or FALSE"""
-        vote_token = gl.eq_principle.strict_eq(lambda p=prompt, f=_nondet_bool_token: f(p))
-        return {"likely": vote_token == "TRUE", "score": 80 if vote_token == "TRUE" else 20, "reason": "ai_bool"}
+Known patterns found in it: {self._relevant_patterns(tx_data)}
+OUTPUT: NONE, LOW, MEDIUM or HIGH"""
+        return gl.eq_principle.strict_eq(lambda p=prompt, f=_nondet_grade_token: f(p))
+
+    def _ai_grades(self, tx_datas: list) -> list:
+        """Grade tx_datas in rounds of AI_GRADE_CHUNK; returns one grade per item."""
+        grades = []
+        for start in range(0, len(tx_datas), self.AI_GRADE_CHUNK):
+            grades.extend(self._ai_grade_chunk(tx_datas[start:start + self.AI_GRADE_CHUNK]))
+        return grades
+
+    def _ai_grade_chunk(self, tx_datas: list) -> list:
+        _nondet_grade_list = self._nondet_grade_list
+        count = len(tx_datas)
+        numbered = "\n".join(
+            f"{i + 1}. {data} (known patterns found in it: {self._relevant_patterns(data)})"
+            for i, data in enumerate(tx_datas)
+        )
+        prompt = f"""SYSTEM: You are a security classifier. Grade each numbered transaction as NONE, LOW, MEDIUM or HIGH.
+HIGH: the transaction is clearly malicious or strongly indicative of a hack.
+MEDIUM: the transaction is likely part of an attack but not clearly malicious.
+LOW: unusual but probably benign.
+NONE: no sign of an attack.
+If uncertain between two grades, return the lower one.
+Transactions:
+{numbered}
+OUTPUT: exactly {count} grades separated by commas, in transaction order, and nothing else"""
+        joined = gl.eq_principle.strict_eq(lambda p=prompt, n=count, f=_nondet_grade_list: f(p, n))
+        return joined.split(",")
+
+    def _apply_verdict(self, verdict: dict, sender: Address, tx_hash: str, trip_breaker: bool = True, origin: str = "") -> bool:
+        """Record the decision for tx_hash; return True if it calls for an auto-pause."""
+        kind = verdict["kind"]
+        risk_score = int(verdict["score"])
+        level = verdict.get("level", "") or self._risk_level(risk_score)
+        self.tx_risk_scores[tx_hash] = risk_score
+        if kind == "none":
+            self.tx_analysis[tx_hash] = json.dumps({
+                "threat": False,
+                "risk_score": risk_score,
+                "risk_level": level,
+                "message": self._analysis_message(False, risk_score, level),
+                "action": self._analysis_action(False, risk_score, level)
+            })
+            return False
+        self._flag_origin(origin)
+        pause = bool(verdict["pause"])
+        analysis = {
+            "threat": True,
+            "risk_score": risk_score,
+            "risk_level": level,
+            "message": self._analysis_message(True, risk_score, level),
+            "action": self._analysis_action(True, risk_score, level)
+        }
+        if kind == "pattern_match":
+            description = verdict["pattern"]
+            self._record_event("pattern_match", tx_hash, risk_score, f"Matched: {description}", sender)
+            if pause and trip_breaker:
+                self._trigger_circuit_breaker(sender, tx_hash, risk_score)
+            self._notify(sender, f"Abnormal activity detected: Pattern match ({description}) on tx {tx_hash}")
+            self._notify(self.admin, f"Alert: Pattern match detected for user {sender} on tx {tx_hash}")
+            self._emit_webhook(sender, f"Abnormal activity detected: Pattern match ({description})", "pattern_match", tx_hash)
+            self._emit_webhook(self.admin, f"Alert: Pattern match detected for user {sender}", "pattern_match", tx_hash)
+            analysis["reason"] = "Pattern match"
+            analysis["pattern"] = description
+            analysis["message"] = f"{analysis['message']} Known attack pattern matched."
+        elif kind == "predicted_threat":
+            self._record_event("predicted_threat", tx_hash, risk_score, verdict["reason"], sender)
+            self._notify(sender, f"Abnormal activity predicted on tx {tx_hash}")
+            self._notify(self.admin, f"Alert: Predicted threat for user {sender} on tx {tx_hash}")
+            self._emit_webhook(sender, "Abnormal activity predicted", "predicted_threat", tx_hash)
+            self._emit_webhook(self.admin, f"Alert: Predicted threat for user {sender}", "predicted_threat", tx_hash)
+            analysis["reason"] = verdict["reason"]
+        else:
+            # ai_detected (validators graded HIGH) or risk_detected (deterministic score alone)
+            reason = "AI consensus" if kind == "ai_detected" else "Risk score"
+            self._record_event(kind, tx_hash, risk_score, reason, sender)
+            if pause and trip_breaker:
+                self._trigger_circuit_breaker(sender, tx_hash, risk_score)
+            self._notify(sender, f"Abnormal activity detected: {reason} flagged your tx {tx_hash}")
+            self._notify(self.admin, f"Alert: {reason} flagged user {sender} on tx {tx_hash}")
+            self._emit_webhook(sender, f"Abnormal activity detected: {reason} flagged your tx", kind, tx_hash)
+            self._emit_webhook(self.admin, f"Alert: {reason} flagged user {sender}", kind, tx_hash)
+            analysis["reason"] = reason
+        self.tx_analysis[tx_hash] = json.dumps(analysis)
+        return pause
+
+    def _cached_verdict(self, digest: str):
+        raw = self.verdict_cache.get(digest, "")
+        if raw == "":
+            return None
+        entry = json.loads(raw)
+        if int(entry.get("version", -1)) != int(self.pattern_version):
+            return None
+        return entry["verdict"]
+
+    def _store_verdict(self, digest: str, verdict: dict):
+        if self.verdict_cache.get(digest, "") == "":
+            slot = u256(int(self.verdict_cache_next) % self.VERDICT_CACHE_SIZE)
+            evicted = self.verdict_cache_keys.get(slot, "")
+            if evicted != "":
+                del self.verdict_cache[evicted]
+            self.verdict_cache_keys[slot] = digest
+            self.verdict_cache_next = u256(int(self.verdict_cache_next) + 1)
+        self.verdict_cache[digest] = json.dumps({
+            "hash": digest,
+            "version": int(self.pattern_version),
+            "verdict": verdict,
+        })
 
     def _trigger_circuit_breaker(self, sender: Address, tx_hash: str, risk_score: int):
         self.circuit_breaker_triggered = True
@@ -420,28 +687,94 @@ OUTPUT: TRUE or FALSE"""
             raise UserError("Only admin can unpause")
         self.is_paused = False
         self.circuit_breaker_triggered = False
+        # Start origin history afresh once the incident is handled.
+        self.history_epoch = u256(int(self.history_epoch) + 1)
         self._record_event("unpaused", "", 0, "Contract unpaused by admin", self.admin)
         self._notify(self.admin, "Contract has been unpaused.")
 
 
+    def _append_pattern(self, signature: str, description: str):
+        pattern_id = len(self.attack_patterns)
+        self.attack_patterns.append(AttackPattern(
+            pattern_id=u256(pattern_id),
+            signature=signature,
+            description=description,
+            confirmed=False
+        ))
+        self.pattern_version = u256(int(self.pattern_version) + 1)
+        if len(signature) < self.PATTERN_ANCHOR_LEN:
+            self.short_pattern_ids.append(u256(pattern_id))
+            return
+        # Any substring of the signature works as its anchor; take the one
+        # with the fewest patterns so far so buckets stay small.
+        n = self.PATTERN_ANCHOR_LEN
+        anchor = signature[:n]
+        fewest = -1
+        for i in range(len(signature) - n + 1):
+            gram = signature[i:i + n]
+            count = len(self.pattern_anchor_index.get(gram, []))
+            if fewest < 0 or count < fewest:
+                anchor, fewest = gram, count
+                if count == 0:
+                    break
+        ids = self.pattern_anchor_index.get(anchor, [])
+        ids.append(u256(pattern_id))
+        self.pattern_anchor_index[anchor] = ids
+
+    def _match_patterns(self, tx_data: str) -> list:
+        """Return the pattern_ids whose signature occurs in tx_data, lowest first.
+
+        Same result as scanning attack_patterns in order. With more patterns
+        than tx_data has characters, only the distinct anchors of tx_data are
+        looked up, so the cost follows len(tx_data) rather than the pattern count.
+        """
+        if len(self.attack_patterns) <= len(tx_data):
+            return [int(p.pattern_id) for p in self.attack_patterns if p.signature in tx_data]
+        matched = set()
+        for pid in self.short_pattern_ids:
+            if self.attack_patterns[int(pid)].signature in tx_data:
+                matched.add(int(pid))
+        n = self.PATTERN_ANCHOR_LEN
+        anchors = {tx_data[i:i + n] for i in range(len(tx_data) - n + 1)}
+        for anchor in anchors:
+            for pid in self.pattern_anchor_index.get(anchor, []):
+                if self.attack_patterns[int(pid)].signature in tx_data:
+                    matched.add(int(pid))
+        return sorted(matched)
+
     @gl.public.write
     def add_attack_pattern(self, signature: str, description: str):
         if gl.message.sender_address != self.admin:
             raise UserError("Only admin can add patterns")
-        pattern = AttackPattern(
-            pattern_id=u256(len(self.attack_patterns)),
-            signature=signature,
-            description=description,
-            confirmed=False
-        )
-        self.attack_patterns.append(pattern)
+        self._append_pattern(signature, description)
         self.last_pattern_added = signature
         self._record_event("pattern_added", "", 0, description, self.admin)
         self._notify(self.admin, f"New attack pattern added: {description}")
 
+    @gl.public.write
+    def add_attack_patterns(self, patterns: list[list[str]]):
+        """Add many [signature, description] patterns in one transaction with a single summary event."""
+        if gl.message.sender_address != self.admin:
+            raise UserError("Only admin can add patterns")
+        for pair in patterns:
+            if len(pair) != 2:
+                raise UserError("Each pattern must be [signature, description]")
+        if len(patterns) == 0:
+            return
+        first_id = len(self.attack_patterns)
+        for pair in patterns:
+            self._append_pattern(pair[0], pair[1])
+        last_id = len(self.attack_patterns) - 1
+        self.last_pattern_added = patterns[-1][0]
+        summary = f"{len(patterns)} attack patterns added (ids {first_id}-{last_id})"
+        self._record_event("patterns_added", "", 0, summary, self.admin)
+        self._notify(self.admin, f"New attack patterns added: {summary}")
+
     @gl.public.write
     def set_thresholds(self, notify_level_min: int, auto_pause_level_min: int):
         self._require_role(self.ADMIN_ROLE)
+        if not 0 <= int(notify_level_min) <= int(auto_pause_level_min) <= 100:
+            raise UserError("Thresholds must satisfy 0 <= notify_level_min <= auto_pause_level_min <= 100")
         self.notify_level_min = u8(notify_level_min)
         self.auto_pause_level_min = u8(auto_pause_level_min)
 
@@ -519,6 +852,15 @@ OUTPUT: TRUE or FALSE"""
     def get_attack_patterns(self) -> DynArray[AttackPattern]:
         return self.attack_patterns
 
+    @gl.public.view
+    def get_attack_patterns_from(self, start: int, limit: int) -> DynArray[AttackPattern]:
+        # Paginated read for off-chain mirrors: pattern_id == index, so callers
+        # can fetch only patterns newer than the highest ID they have cached.
+        total = len(self.attack_patterns)
+        begin = min(max(0, int(start)), total)
+        end = min(total, begin + max(0, int(limit)))
+        return [self.attack_patterns[i] for i in range(begin, end)]
+
     @gl.public.view
     def is_address_blacklisted(self, addr: Address) -> bool:
         addr_norm = self._to_address(addr)
@@ -0,0 +1,253 @@
+import base64
+import http.client
+import io
+import select
+import threading
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import SplitResult, unquote, urljoin, urlsplit
+
+
+# (scheme, host, port, proxy netloc or "")
+_PoolKey = Tuple[str, str, int, str]
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Errors that mean a reused keep-alive connection was closed by the server
+# before it answered. The request is retried once on a fresh connection if it
+# is idempotent or was never written out; a POST the server may have received
+# (e.g. a JSON-RPC write) is not sent twice.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE")
+
+
+class _Unsent(Exception):
+    """A stale-connection error raised while the request was being written."""
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+class PooledResponse:
+    """Response handed out by ``HTTPPool.request``.
+
+    Behaves like the object ``urllib.request.urlopen`` returns (``status``,
+    ``headers``, ``read``, context manager). The connection goes back to the pool
+    on ``close()`` when the body was read to the end, and is discarded otherwise.
+    """
+
+    def __init__(self, pool: "HTTPPool", key: _PoolKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse):
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.msg
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self._resp.read()
+        return self._resp.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        """Return what one socket read yields (up to ``size`` bytes), without waiting for more."""
+        return self._resp.read1(size)
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        reusable = self._resp.isclosed() and not self._resp.will_close
+        if not reusable:
+            self._resp.close()
+        self._pool._release(self._key, self._conn, reusable)
+        self._conn = None
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class HTTPPool:
+    """Thread-safe keep-alive connection pool over ``http.client``.
+
+    At most ``max_per_host`` connections per (scheme, host, port) are in use at
+    once; further requests wait up to ``timeout`` seconds for a free slot. Idle
+    connections are reused for later requests to the same host. Non-2xx answers
+    raise ``urllib.error.HTTPError``, GET redirects are followed and the
+    ``http_proxy`` / ``https_proxy`` / ``no_proxy`` environment variables are
+    honoured, matching ``urllib.request.urlopen``.
+    """
+
+    def __init__(self, max_per_host: int = 4, timeout: float = 30.0):
+        self.max_per_host = max(1, int(max_per_host))
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._slots: Dict[_PoolKey, threading.BoundedSemaphore] = {}
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        max_redirects: int = 5,
+    ) -> PooledResponse:
+        timeout = self.timeout if timeout is None else timeout
+        for _ in range(max_redirects + 1):
+            resp = self._request_once(method, url, body, headers or {}, timeout)
+            location = resp.headers.get("Location")
+            if resp.status in _REDIRECT_CODES and location and method in ("GET", "HEAD"):
+                resp.read()
+                resp.close()
+                url = urljoin(url, location)
+                continue
+            if not 200 <= resp.status < 300:
+                data = resp.read()
+                resp.close()
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+            return resp
+        raise urllib.error.URLError(f"Too many redirects for {url}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _request_once(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float) -> PooledResponse:
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        proxy = _proxy_for(scheme, host)
+        key = (scheme, host, port, proxy.netloc if proxy else "")
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        if proxy is not None and scheme == "http":
+            # Plain HTTP goes to the proxy with the absolute URL; HTTPS is tunnelled.
+            path = f"http://{parts.netloc}{path}"
+            auth = _proxy_auth(proxy)
+            if auth:
+                headers = dict(headers, **auth)
+
+        slot = self._slot(key)
+        if not slot.acquire(timeout=timeout):
+            raise TimeoutError(f"No free connection to {host}:{port} within {timeout}s")
+        try:
+            conn, reused = self._checkout(key, timeout)
+            try:
+                resp = self._send(conn, method, path, body, headers)
+            except _Unsent as exc:
+                if not reused:
+                    raise exc.error
+                resp = None
+            except _STALE_ERRORS:
+                if not reused or method.upper() not in _IDEMPOTENT_METHODS:
+                    raise
+                resp = None
+            if resp is None:
+                conn = self._connect(key, timeout)
+                try:
+                    resp = self._send(conn, method, path, body, headers)
+                except _Unsent as exc:
+                    raise exc.error
+        except BaseException:
+            slot.release()
+            raise
+        return PooledResponse(self, key, conn, resp)
+
+    @staticmethod
+    def _send(
+        conn: http.client.HTTPConnection, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]
+    ) -> http.client.HTTPResponse:
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except _STALE_ERRORS as exc:
+                raise _Unsent(exc) from exc
+            return conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def _slot(self, key: _PoolKey) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _connect(self, key: _PoolKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port, proxy_netloc = key
+        if not proxy_netloc:
+            if scheme == "https":
+                return http.client.HTTPSConnection(host, port, timeout=timeout)
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+        proxy = urlsplit(f"//{proxy_netloc}")
+        proxy_host, proxy_port = proxy.hostname or "", proxy.port or 80
+        if scheme == "http":
+            return http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout)
+        conn.set_tunnel(host, port, headers=_proxy_auth(proxy))
+        return conn
+
+    def _checkout(self, key: _PoolKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None and conn.sock is not None and _dropped(conn.sock):
+            # Closed by the server while idle: don't spend a request finding out.
+            conn.close()
+            conn = None
+        if conn is None:
+            return self._connect(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_per_host:
+                    idle.append(conn)
+                    conn = None
+        if conn is not None:
+            conn.close()
+        self._slots[key].release()
+
+
+def _dropped(sock) -> bool:
+    """True if an idle keep-alive socket has been closed (or written to) by the server."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[SplitResult]:
+    """The proxy ``urllib`` would use for ``scheme://host``, from the ``*_proxy`` variables."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    return urlsplit(proxy)
+
+
+def _proxy_auth(proxy: SplitResult) -> Dict[str, str]:
+    if proxy.username is None:
+        return {}
+    credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
@@ -0,0 +1,71 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+# Inflections accepted after a keyword: "exploit" also scores "exploited" and
+# "exploits", "hack" also scores "hackers" and "hacking".
+_SUFFIXES = r"(?:s|es|ed|er|ers|ing)?"
+# Up to this many keywords, a plain substring scan is cheaper than the regex,
+# so it is used to skip texts that cannot contain any keyword.
+_PREFILTER_MAX_KEYWORDS = 64
+
+
+def build_trie_regex(words: Iterable[str]) -> str:
+    """Render ``words`` as one prefix-factored regex alternation.
+
+    Sharing prefixes keeps the regex engine from retrying every keyword at every
+    position, so matching stays close to a single pass even for thousands of words.
+    Optional suffixes are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return render(trie)
+
+
+class KeywordMatcher:
+    """Weighted keyword scorer compiled once into a single word-bounded regex.
+
+    Each keyword counts at most once per text, a longer keyword shadows a shorter
+    one sharing its prefix ("hacked" does not also score "hack"), and keywords do
+    not match inside unrelated words. Common inflections (s, es, ed, er, ers,
+    ing) count as the keyword itself.
+    """
+
+    def __init__(self, weights: Dict[str, int], max_score: int = 100):
+        self.weights = {k.lower(): int(v) for k, v in weights.items() if k}
+        self.max_score = max_score
+        self._re = re.compile(r"(?<!\w)(" + build_trie_regex(self.weights) + ")" + _SUFFIXES + r"(?!\w)")
+        self._prefilter = list(self.weights) if len(self.weights) <= _PREFILTER_MAX_KEYWORDS else None
+
+    def score(self, text: str) -> Tuple[int, List[str]]:
+        hits: List[str] = []
+        seen = set()
+        if not self.weights:
+            return 0, hits
+        text = text.lower()
+        if self._prefilter is not None and not any(k in text for k in self._prefilter):
+            return 0, hits
+        for m in self._re.finditer(text):
+            keyword = m.group(1)
+            if keyword not in seen:
+                seen.add(keyword)
+                hits.append(keyword)
+        score = sum(self.weights[k] for k in hits)
+        return min(score, self.max_score), hits
@@ -1,11 +1,27 @@
+import argparse
 import hashlib
 import json
+import os
+import signal
+import sys
 import time
+import urllib.error
 import urllib.parse
-import urllib.request
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from chain_prescreen import ChainPrescreener
+from feed_cache import FeedCache
+from feed_scheduler import FeedScheduler, max_age_seconds
+from http_pool import HTTPPool
+from keyword_matcher import KeywordMatcher
+from metrics import Registry, start_metrics_server
+from pattern_mirror import PageMethodMissing, PatternMirror, is_missing_method, parse_patterns
+from seen_store import SeenStore
+from story_clusters import StoryClusterer
+from submit_queue import SubmissionQueue
 
 
 RPC_URL = "https://studio.genlayer.com/api"
@@ -14,14 +30,92 @@ CONTRACT_ADDRESS = "0x57a3212cbca238455291ad8ca2CA51F4D269Ae6F"
 # RPC method: use "gen_sendTransaction" if your RPC supports it.
 # If unsure, start with "gen_call" (won't persist on-chain).
 CALL_METHOD = "gen_sendTransaction"  # or "gen_call"
+VIEW_METHOD = "gen_call"
 
 # Optional fields for some RPC backends
 FROM_ADDRESS = ""  # set if your RPC requires a sender
 
+# Alerts are handed to a background submission queue so fetching and scoring
+# never wait on the chain. Workers send JSON-RPC batches of RPC_BATCH_SIZE,
+# throttled to SUBMIT_RATE_PER_SECOND alerts, and retry failures with
+# exponential backoff. Alerts that still fail after SUBMIT_MAX_ATTEMPTS, or
+# are pending at shutdown, go to DEAD_LETTER_FILE and are replayed on start.
+RPC_BATCH_SIZE = 20
+RPC_TIMEOUT_SECONDS = 30
+SUBMIT_WORKERS = 2
+SUBMIT_QUEUE_MAX = 1000
+SUBMIT_MAX_ATTEMPTS = 6
+SUBMIT_BACKOFF_SECONDS = 2
+SUBMIT_BACKOFF_MAX_SECONDS = 300
+SUBMIT_RATE_PER_SECOND = 5
+DEAD_LETTER_FILE = "monitor_dead_letter.jsonl"
+
+# Keep-alive connections shared by feed fetches and RPC calls.
+HTTP_MAX_PER_HOST = 4
+
+# Base poll interval per feed. Each feed adapts between the min and max:
+# quiet or failing feeds back off, a feed yielding FEED_BURST_ALERTS or more
+# alerts in one poll is polled at the minimum, and RSS <ttl> / Cache-Control
+# max-age are honored as a lower bound.
 POLL_SECONDS = 45
+FEED_MIN_POLL_SECONDS = 15
+FEED_MAX_POLL_SECONDS = 900
+FEED_BACKOFF_FACTOR = 1.5
+FEED_BURST_ALERTS = 2
 SCORE_THRESHOLD = 60
 
+# Alerts whose titles are near-duplicates (MinHash Jaccard >= threshold) of an
+# alert from the last STORY_WINDOW_SECONDS are one story: merged into a single
+# submission within a cycle, and not resubmitted in later cycles.
+STORY_WINDOW_SECONDS = 6 * 3600
+STORY_SIMILARITY = 0.5
+
+# Feeds are fetched in parallel; a feed that has not answered within the
+# deadline is skipped for this cycle instead of holding up the others.
+FETCH_WORKERS = 8
+FEED_DEADLINE_SECONDS = 20
+# Feeds list newest items first: stop reading a feed after this many
+# consecutive items that were already seen.
+FEED_STOP_AFTER_SEEN = 5
+
+# Legacy full-rewrite state file; imported once into SEEN_FILE if present.
 STATE_FILE = "monitor_state.json"
+# Append-only journal of seen IDs; compacted into SEEN_FILE.snapshot every
+# SEEN_SNAPSHOT_EVERY cycles.
+SEEN_FILE = "monitor_seen.jsonl"
+SEEN_TTL_DAYS = 14
+SEEN_SNAPSHOT_EVERY = 100
+# ETag / Last-Modified / body digest per feed, used for conditional GETs.
+FEED_CACHE_FILE = "monitor_feed_cache.json"
+
+
+# Local mirror of the contract's attack patterns, refreshed every
+# PATTERN_SYNC_SECONDS. Alerts matching a known pattern are always submitted
+# (label=known_pattern); the rest only when their local score reaches the
+# mode's NEEDS_AI_MIN_SCORE (label=needs_ai), so weak items never cost a write.
+# Syncs only read patterns newer than the mirror's highest pattern_id, in pages
+# of PATTERN_SYNC_PAGE_SIZE.
+PATTERN_MIRROR_FILE = "monitor_patterns.json"
+PATTERN_SYNC_SECONDS = 300
+PATTERN_SYNC_PAGE_SIZE = 200
+# Headlines reaching SCORE_THRESHOLD are alerts, but unless they match a known
+# pattern they also need this stronger score to be worth an on-chain write.
+NEWS_NEEDS_AI_MIN_SCORE = 75
+CHAIN_NEEDS_AI_MIN_SCORE = 45
+
+# Prometheus text metrics on http://127.0.0.1:METRICS_PORT/metrics (0 = off).
+METRICS_PORT = 0
+
+# On-chain mode (python monitor.py --mode chain): read blocks and logs from an
+# EVM JSON-RPC endpoint, pre-screen transactions touching PROTECTED_ADDRESSES
+# locally, and submit only those scoring CHAIN_SCORE_THRESHOLD or more.
+EVM_RPC_URL = "http://127.0.0.1:8545"
+PROTECTED_ADDRESSES: List[str] = []
+CHAIN_POLL_SECONDS = 4
+CHAIN_CONFIRMATIONS = 2
+CHAIN_MAX_BLOCKS_PER_POLL = 20
+CHAIN_SCORE_THRESHOLD = 40
+CHAIN_STATE_FILE = "monitor_chain_state.json"
 
 
 KEYWORDS = {
@@ -44,6 +138,29 @@ KEYWORDS = {
     "exploiters": 25,
 }
 
+# Compiled once at startup; see keyword_matcher.py. At this size it is slower than a
+# plain substring test on alert-like text (about 12us vs 2us, bench_score_text.py),
+# the price of whole-word matching; it pays off only for much larger tables (8x at 1k).
+_KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
+_HTTP = HTTPPool(max_per_host=HTTP_MAX_PER_HOST, timeout=RPC_TIMEOUT_SECONDS)
+
+_METRICS = Registry()
+_M_FEED_FETCH = _METRICS.histogram("monitor_feed_fetch_seconds", "Feed fetch latency.", ["feed", "outcome"])
+_M_FEED_TIMEOUTS = _METRICS.counter("monitor_feed_timeouts_total", "Feeds skipped for missing the deadline.", ["feed"])
+_M_CYCLE_ITEMS = _METRICS.gauge("monitor_cycle_items", "New items parsed in the last cycle.")
+_M_ITEMS = _METRICS.counter("monitor_items_total", "New items parsed.")
+_M_SCORING = _METRICS.histogram("monitor_scoring_seconds", "Time spent scoring and clustering per cycle.")
+_M_CYCLE_ALERTS = _METRICS.gauge("monitor_cycle_alerts", "Alerts submitted in the last cycle.")
+_M_ALERTS = _METRICS.counter("monitor_alerts_total", "Alerts submitted.")
+_M_RPC = _METRICS.histogram("monitor_rpc_seconds", "JSON-RPC round-trip latency.", ["method"])
+_M_RPC_ERRORS = _METRICS.counter("monitor_rpc_errors_total", "Failed JSON-RPC requests or calls.", ["method"])
+_M_CYCLE = _METRICS.histogram("monitor_cycle_seconds", "Duration of one monitor cycle.", ["mode"])
+_M_INTERVAL = _METRICS.gauge("monitor_poll_interval_seconds", "Configured poll interval.", ["mode"])
+_M_OVERRUNS = _METRICS.counter("monitor_cycle_overruns_total", "Cycles that took longer than the poll interval.", ["mode"])
+_M_SUBMIT_DEPTH = _METRICS.gauge("monitor_submit_queue_depth", "Alerts queued or in flight.")
+_M_SUBMIT_EVENTS = _METRICS.counter("monitor_submit_events_total", "Submission outcomes (sent, retry, dead_letter).", ["event"])
+_M_STATE_BYTES = _METRICS.gauge("monitor_state_file_bytes", "Size of persisted state files.", ["file"])
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -53,43 +170,216 @@ def _load_state() -> Dict[str, Any]:
     try:
         with open(STATE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
-    except Exception:
+    except Exception as e:
+        print(f"[{_now_iso()}] Warning: could not read legacy state {STATE_FILE} ({e}); nothing imported.")
         return {"seen": {}}
 
 
-def _save_state(state: Dict[str, Any]) -> None:
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, sort_keys=True)
+def _load_seen_store() -> SeenStore:
+    is_new = not os.path.exists(SEEN_FILE) and not os.path.exists(f"{SEEN_FILE}.snapshot")
+    store = SeenStore(SEEN_FILE, SEEN_TTL_DAYS * 86400, SEEN_SNAPSHOT_EVERY)
+    if is_new and os.path.exists(STATE_FILE):
+        legacy: Dict[str, float] = {}
+        for item_id, seen_at in _load_state().get("seen", {}).items():
+            try:
+                legacy[item_id] = datetime.fromisoformat(seen_at).timestamp()
+            except Exception:
+                legacy[item_id] = time.time()
+        store.import_entries(legacy)
+        store.flush()
+        store.snapshot()
+        print(f"[{_now_iso()}] Imported {len(store)} seen items from {STATE_FILE}")
+    return store
 
 
 def _score_text(text: str) -> Tuple[int, List[str]]:
-    t = text.lower()
-    score = 0
-    hits: List[str] = []
-    for k, v in KEYWORDS.items():
-        if k in t:
-            score += v
-            hits.append(k)
-    return min(score, 100), hits
+    return _KEYWORD_MATCHER.score(text)
 
 
 def _hash_id(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
-def _fetch_rss(url: str) -> List[Dict[str, str]]:
-    req = urllib.request.Request(url, headers={"User-Agent": "GenLayerMonitor/1.0"})
-    with urllib.request.urlopen(req, timeout=20) as resp:
-        data = resp.read()
-    root = ET.fromstring(data)
-    items = []
-    for item in root.iter("item"):
-        title = (item.findtext("title") or "").strip()
-        link = (item.findtext("link") or "").strip()
-        pub_date = (item.findtext("pubDate") or "").strip()
-        guid = (item.findtext("guid") or link).strip()
-        items.append({"title": title, "link": link, "pub_date": pub_date, "id": guid})
-    return items
+def _item_id(item: Dict[str, str]) -> str:
+    return _hash_id(item.get("id", "") + item.get("link", ""))
+
+
+class _DigestReader:
+    """File-like wrapper that hashes the bytes a streaming parser pulls through it.
+
+    Reading past ``deadline`` (a ``time.monotonic()`` value) raises TimeoutError,
+    so a feed that trickles its body cannot outlive the cycle.
+    """
+
+    def __init__(self, raw: Any, deadline: Optional[float] = None):
+        self.raw = raw
+        self.deadline = deadline
+        self.sha = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError("feed deadline reached mid-body")
+        # read1 returns after one socket read, so the deadline is checked even
+        # while a body trickles in; a plain read would wait for ``size`` bytes.
+        chunk = getattr(self.raw, "read1", self.raw.read)(size)
+        self.sha.update(chunk)
+        return chunk
+
+
+def _iter_rss_items(stream: Any, channel: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+    """Yield RSS items as they are parsed, dropping each element once it is read.
+
+    Channel-level fields seen along the way (currently ``ttl``) are stored in ``channel``.
+    """
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == "ttl" and channel is not None:
+            channel["ttl"] = (elem.text or "").strip()
+        if elem.tag != "item":
+            continue
+        title = (elem.findtext("title") or "").strip()
+        link = (elem.findtext("link") or "").strip()
+        pub_date = (elem.findtext("pubDate") or "").strip()
+        guid = (elem.findtext("guid") or link).strip()
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+        yield {"title": title, "link": link, "pub_date": pub_date, "id": guid}
+
+
+# Unseen items of one feed (None when unchanged) and the validators to store
+# in the feed cache once those items have been processed.
+FeedResult = Tuple[Optional[List[Dict[str, str]]], Optional[Dict[str, str]]]
+
+
+def _fetch_rss(
+    url: str,
+    cache: Optional[FeedCache] = None,
+    seen: Optional[SeenStore] = None,
+    scheduler: Optional[FeedScheduler] = None,
+    deadline: Optional[float] = None,
+) -> FeedResult:
+    """Return the feed's unseen items (None when the feed has not changed since the last poll) and its validators.
+
+    Items are parsed straight off the socket. Feeds are newest-first, so when
+    ``seen`` is given, parsing stops after FEED_STOP_AFTER_SEEN consecutive
+    already-seen items. RSS ``<ttl>`` and ``Cache-Control: max-age`` are passed
+    to ``scheduler`` as polling hints.
+
+    ``cache`` is only read here. The caller stores the returned validators
+    (``etag``, ``last_modified``, ``digest``) with ``FeedCache.remember`` after
+    the items are handled, so items are never lost to a later 304.
+
+    With a ``deadline`` (``time.monotonic()`` value), the socket timeout is
+    what is left of it and reading stops with TimeoutError once it passes.
+    """
+    timeout = FEED_DEADLINE_SECONDS
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError("feed deadline reached before the request")
+    headers = {"User-Agent": "GenLayerMonitor/1.0"}
+    if cache is not None:
+        headers.update(cache.request_headers(url))
+    items: List[Dict[str, str]] = []
+    try:
+        with _HTTP.request("GET", url, headers=headers, timeout=timeout) as resp:
+            etag = resp.headers.get("ETag", "")
+            last_modified = resp.headers.get("Last-Modified", "")
+            max_age = max_age_seconds(resp.headers.get("Cache-Control", ""))
+            reader = _DigestReader(resp, deadline)
+            channel: Dict[str, str] = {}
+            seen_run = 0
+            stopped_early = False
+            for item in _iter_rss_items(reader, channel):
+                if seen is not None and _item_id(item) in seen:
+                    seen_run += 1
+                    if seen_run >= FEED_STOP_AFTER_SEEN:
+                        stopped_early = True
+                        break
+                    continue
+                seen_run = 0
+                items.append(item)
+        if scheduler is not None:
+            hint = max_age or 0
+            if channel.get("ttl", "").isdigit():
+                hint = max(hint, int(channel["ttl"]) * 60)
+            scheduler.set_hint(url, hint)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cache is not None:
+            cache.not_modified(url)
+            return None, None
+        raise
+    # Partially read bodies never count as unchanged.
+    digest = "" if stopped_early else reader.sha.hexdigest()
+    validators = {"etag": etag, "last_modified": last_modified, "digest": digest}
+    if cache is not None and not cache.changed(url, digest):
+        return None, validators
+    return items, validators
+
+
+def _timed_fetch(
+    url: str,
+    cache: Optional[FeedCache] = None,
+    seen: Optional[SeenStore] = None,
+    scheduler: Optional[FeedScheduler] = None,
+    deadline: Optional[float] = None,
+) -> Tuple[FeedResult, float, Optional[Exception]]:
+    start = time.monotonic()
+    try:
+        return _fetch_rss(url, cache, seen, scheduler, deadline=deadline), time.monotonic() - start, None
+    except Exception as e:
+        return ([], None), time.monotonic() - start, e
+
+
+def _fetch_all(
+    sources: List[str],
+    cache: Optional[FeedCache] = None,
+    seen: Optional[SeenStore] = None,
+    scheduler: Optional[FeedScheduler] = None,
+) -> Dict[str, FeedResult]:
+    """Fetch feeds concurrently, bounded by FEED_DEADLINE_SECONDS overall.
+
+    Returns (items, validators) per feed, as from ``_fetch_rss``. Feeds that
+    failed or missed the deadline are left out. Each fetch gets the same
+    deadline, so a straggler gives up (and frees its connection slot) shortly
+    after it; its items are fetched again next poll.
+    """
+    results: Dict[str, FeedResult] = {}
+    if not sources:
+        return results
+    deadline = time.monotonic() + FEED_DEADLINE_SECONDS
+    pool = ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(sources)), thread_name_prefix="feed-fetch")
+    futures = {pool.submit(_timed_fetch, src, cache, seen, scheduler, deadline): src for src in sources}
+    try:
+        for fut in as_completed(futures, timeout=FEED_DEADLINE_SECONDS):
+            src = futures[fut]
+            result, elapsed, err = fut.result()
+            if err is not None:
+                _M_FEED_FETCH.observe(elapsed, feed=src, outcome="error")
+                print(f"[{_now_iso()}] RSS error: {src} -> {err} ({elapsed:.2f}s)")
+                continue
+            results[src] = result
+            feed_items = result[0]
+            if feed_items is None:
+                _M_FEED_FETCH.observe(elapsed, feed=src, outcome="unchanged")
+                print(f"[{_now_iso()}] RSS {src}: unchanged in {elapsed:.2f}s")
+                continue
+            _M_FEED_FETCH.observe(elapsed, feed=src, outcome="ok")
+            print(f"[{_now_iso()}] RSS {src}: {len(feed_items)} new items in {elapsed:.2f}s")
+    except FuturesTimeout:
+        for fut, src in futures.items():
+            if not fut.done():
+                _M_FEED_TIMEOUTS.inc(feed=src)
+                print(f"[{_now_iso()}] RSS timeout: {src} exceeded {FEED_DEADLINE_SECONDS}s, skipped this cycle")
+    finally:
+        # Do not block the cycle on stragglers; they stop at the shared deadline.
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
 
 
 def _news_sources() -> List[str]:
@@ -101,73 +391,416 @@ def _news_sources() -> List[str]:
     ]
 
 
-def _rpc_call(method: str, params: List[Any]) -> Dict[str, Any]:
+def _post_json(payload: Any, url: str = RPC_URL) -> Any:
+    if isinstance(payload, list):
+        method = f"batch:{payload[0]['method']}" if payload else "batch"
+    else:
+        method = payload.get("method", "")
+    data = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    start = time.monotonic()
+    try:
+        with _HTTP.request("POST", url, body=data, headers=headers, timeout=RPC_TIMEOUT_SECONDS) as resp:
+            raw = resp.read().decode("utf-8")
+        return json.loads(raw)
+    except Exception:
+        _M_RPC_ERRORS.inc(method=method)
+        raise
+    finally:
+        _M_RPC.observe(time.monotonic() - start, method=method)
+
+
+def _rpc_call(method: str, params: List[Any], url: str = RPC_URL) -> Dict[str, Any]:
     payload = {
         "jsonrpc": "2.0",
         "id": int(time.time()),
         "method": method,
         "params": params,
     }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        RPC_URL, data=data, headers={"Content-Type": "application/json"}
-    )
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read().decode("utf-8")
-    return json.loads(raw)
+    return _post_json(payload, url)
+
+
+class BatchUnsupported(Exception):
+    """The JSON-RPC endpoint answered a batch with something other than a batch array."""
+
+
+def _rpc_batch(calls: List[Tuple[str, List[Any]]], url: str = RPC_URL) -> List[Dict[str, Any]]:
+    """Send ``calls`` as one JSON-RPC batch and return the responses in call order.
+
+    Raises BatchUnsupported if the endpoint answers with a single object
+    instead of a batch array. Transport and decode errors propagate as-is:
+    the batch may have been executed, so it must not be resent call by call.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    responses = _post_json(payload, url)
+    if not isinstance(responses, list):
+        raise BatchUnsupported(f"RPC endpoint did not return a batch response: {responses}")
+    by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+    missing = {"error": {"code": -32603, "message": "No response for call in batch"}}
+    return [by_id.get(i, missing) for i in range(len(calls))]
 
 
-def _call_analyze(tx_data: str, tx_hash: str) -> None:
+def _analyze_tx_obj(tx_data: str, tx_hash: str, origin: str = "") -> Dict[str, Any]:
     args = [tx_data, tx_hash]
+    if origin:
+        # The contract keys its per-originator risk history on this.
+        args.append(origin)
     tx_obj = {"to": CONTRACT_ADDRESS, "method": "analyze_transaction", "args": args}
     if FROM_ADDRESS:
         tx_obj["from"] = FROM_ADDRESS
+    return tx_obj
+
+
+def _call_analyze(tx_data: str, tx_hash: str, origin: str = "") -> Dict[str, Any]:
     # Some StudioNet setups expect params: [tx_obj]
-    result = _rpc_call(CALL_METHOD, [tx_obj])
-    print(f"[{_now_iso()}] analyze_transaction -> {result}")
+    return _rpc_call(CALL_METHOD, [_analyze_tx_obj(tx_data, tx_hash, origin)])
 
 
-def main() -> None:
-    state = _load_state()
-    seen = state.get("seen", {})
+def _fetch_pattern_page(start: int, limit: int) -> List[Tuple[int, str, str]]:
+    res = _rpc_call(VIEW_METHOD, [{"to": CONTRACT_ADDRESS, "method": "get_attack_patterns_from", "args": [start, limit]}])
+    if "error" in res:
+        if is_missing_method(res["error"]):
+            raise PageMethodMissing(f"get_attack_patterns_from unavailable: {res['error']}")
+        raise RuntimeError(f"get_attack_patterns_from failed: {res['error']}")
+    return parse_patterns(res.get("result"))
+
+
+def _sync_patterns(mirror: PatternMirror) -> None:
+    try:
+        try:
+            added, resynced = mirror.sync(_fetch_pattern_page, PATTERN_SYNC_PAGE_SIZE)
+        except PageMethodMissing:
+            # Contracts deployed before get_attack_patterns_from only have the full view.
+            res = _rpc_call(VIEW_METHOD, [{"to": CONTRACT_ADDRESS, "method": "get_attack_patterns", "args": []}])
+            rows = parse_patterns(res.get("result"))
+            resynced = len(rows) < len(mirror)
+            if resynced:
+                mirror.reset()
+            added = mirror.apply(rows)
+    except Exception as e:
+        print(f"[{_now_iso()}] Pattern sync failed ({e}); using {len(mirror)} cached patterns")
+        return
+    if added or resynced:
+        mirror.save()
+        note = " after full resync" if resynced else ""
+        print(f"[{_now_iso()}] Pattern sync: +{added} patterns{note} ({len(mirror)} total)")
+
+
+def _label_alerts(
+    mirror: PatternMirror, candidates: List[Tuple[str, str, int, str]], needs_ai_min_score: int
+) -> List[Tuple[str, str, str]]:
+    """Tag (tx_data, tx_hash, score, origin) candidates with the mirror's verdict and drop weak unmatched ones.
+
+    Returns (tx_data, tx_hash, origin) alerts.
+    """
+    alerts: List[Tuple[str, str, str]] = []
+    for tx_data, tx_hash, score, origin in candidates:
+        hit = mirror.match(tx_data)
+        if hit is not None:
+            alerts.append((f"{tx_data} label=known_pattern:{hit[0]}", tx_hash, origin))
+        elif score >= needs_ai_min_score:
+            alerts.append((f"{tx_data} label=needs_ai", tx_hash, origin))
+        else:
+            print(f"[{_now_iso()}] Dropped {tx_hash}: no known pattern and score {score} < {needs_ai_min_score}")
+    return alerts
+
+
+def _label_clusters(
+    stories: StoryClusterer,
+    mirror: PatternMirror,
+    clusters: Dict[int, List[Tuple[int, List[str], Dict[str, str]]]],
+    needs_ai_min_score: int,
+) -> List[Tuple[str, str, str]]:
+    """Label this cycle's new story clusters; forget the ones ``_label_alerts`` drops.
+
+    A story only counts as submitted if its alert is, so a later, stronger
+    report of a dropped story is not skipped as a duplicate.
+    """
+    candidates = [_cluster_alert(members) for members in clusters.values()]
+    alerts = _label_alerts(mirror, candidates, needs_ai_min_score)
+    submitted = {tx_hash for _, tx_hash, _ in alerts}
+    for cluster_id, (_, tx_hash, _, _) in zip(clusters, candidates):
+        if tx_hash not in submitted:
+            stories.forget(cluster_id)
+    return alerts
+
+
+def _cluster_alert(members: List[Tuple[int, List[str], Dict[str, str]]]) -> Tuple[str, str, int, str]:
+    """Build one (tx_data, tx_hash, score, origin) for a story reported by several sources.
+
+    News has no on-chain originator, so origin is always "".
+    """
+    members = sorted(members, key=lambda m: m[0], reverse=True)
+    score, _, lead = members[0]
+    hits: List[str] = []
+    for _, member_hits, _ in members:
+        hits.extend(h for h in member_hits if h not in hits)
+    tx_hash = "0x" + _hash_id(lead.get("link", "") or _item_id(lead))[:64]
+    tx_data = (
+        f"news_alert title='{lead.get('title','')}' "
+        f"link='{lead.get('link','')}' "
+        f"pub_date='{lead.get('pub_date','')}' "
+        f"score={score} hits={hits}"
+    )
+    if len(members) > 1:
+        links = [m[2].get("link", "") for m in members]
+        tx_data += f" sources={len(links)} links={links}"
+    return tx_data, tx_hash, score, ""
+
+
+def _send_alert_batch(chunk: List[Tuple[str, str, str]]) -> List[Optional[str]]:
+    """Send (tx_data, tx_hash, origin) alerts as one JSON-RPC batch; return an error message or None per alert.
+
+    Transport failures and unreadable replies raise, so the submission queue
+    retries or dead-letters the whole batch instead of resending it call by call.
+    """
+    calls = [(CALL_METHOD, [_analyze_tx_obj(tx_data, tx_hash, origin)]) for tx_data, tx_hash, origin in chunk]
+    try:
+        results = _rpc_batch(calls)
+    except BatchUnsupported as e:
+        print(f"[{_now_iso()}] Batch submit unsupported ({e}); submitting {len(chunk)} alerts one by one")
+        results = []
+        for tx_data, tx_hash, origin in chunk:
+            try:
+                results.append(_call_analyze(tx_data, tx_hash, origin))
+            except Exception as item_err:
+                results.append({"error": str(item_err)})
+    errors: List[Optional[str]] = []
+    for (_, tx_hash, _), result in zip(chunk, results):
+        if "error" in result:
+            _M_RPC_ERRORS.inc(method="analyze_transaction")
+            print(f"[{_now_iso()}] analyze_transaction {tx_hash} error: {result['error']}")
+            errors.append(str(result["error"]))
+        else:
+            print(f"[{_now_iso()}] analyze_transaction {tx_hash} -> {result.get('result')}")
+            errors.append(None)
+    return errors
+
+
+def _submit_alerts(queue: SubmissionQueue, alerts: List[Tuple[str, str, str]]) -> None:
+    for tx_data, tx_hash, origin in alerts:
+        queue.put(tx_data, tx_hash, origin)
+
+
+def _build_submit_queue() -> SubmissionQueue:
+    queue = SubmissionQueue(
+        _send_alert_batch,
+        DEAD_LETTER_FILE,
+        workers=SUBMIT_WORKERS,
+        max_pending=SUBMIT_QUEUE_MAX,
+        batch_size=RPC_BATCH_SIZE,
+        max_attempts=SUBMIT_MAX_ATTEMPTS,
+        backoff_seconds=SUBMIT_BACKOFF_SECONDS,
+        backoff_max_seconds=SUBMIT_BACKOFF_MAX_SECONDS,
+        rate_per_second=SUBMIT_RATE_PER_SECOND,
+        on_event=lambda kind: _M_SUBMIT_EVENTS.inc(event=kind),
+    )
+    replayed = queue.replay_dead_letters()
+    if replayed:
+        print(f"[{_now_iso()}] Replaying {replayed} dead-lettered alerts from {DEAD_LETTER_FILE}")
+    return queue
+
+
+def _end_cycle(mode: str, started: float, interval: float, items: int, alerts: int, state_files: List[str]) -> None:
+    duration = time.monotonic() - started
+    _M_CYCLE.observe(duration, mode=mode)
+    _M_INTERVAL.set(interval, mode=mode)
+    if duration > interval:
+        _M_OVERRUNS.inc(mode=mode)
+        print(f"[{_now_iso()}] Cycle took {duration:.1f}s, longer than the {interval}s interval")
+    _M_CYCLE_ITEMS.set(items)
+    _M_ITEMS.inc(items)
+    _M_CYCLE_ALERTS.set(alerts)
+    _M_ALERTS.inc(alerts)
+    for path in state_files:
+        try:
+            _M_STATE_BYTES.set(os.path.getsize(path), file=path)
+        except OSError:
+            pass
+
+
+def _load_chain_cursor() -> int:
+    try:
+        with open(CHAIN_STATE_FILE, "r", encoding="utf-8") as f:
+            return int(json.load(f)["last_block"])
+    except FileNotFoundError:
+        return -1
+    except Exception as e:
+        print(f"[{_now_iso()}] Warning: could not read {CHAIN_STATE_FILE} ({e}); starting from the chain head.")
+        return -1
+
+
+def _save_chain_cursor(block: int) -> None:
+    tmp_path = f"{CHAIN_STATE_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_block": block}, f)
+    os.replace(tmp_path, CHAIN_STATE_FILE)
+
+
+def _chain_tx_alert(tx: Dict[str, Any]) -> Tuple[str, str, int, str]:
+    tx_data = (
+        f"chain_tx hash={tx['hash']} block={tx['block']} from={tx['from']} to={tx['to'] or 'create'} "
+        f"selector={tx['selector']} value_wei={tx['value_wei']} "
+        f"score={tx['score']} reasons={tx['reasons']}"
+    )
+    return tx_data, tx["hash"], tx["score"], tx["from"]
+
+
+def _chain_step(screener: ChainPrescreener, cursor: int) -> Tuple[int, List[Tuple[str, str, int, str]]]:
+    """Screen the confirmed blocks after ``cursor``; return the new cursor and alert candidates."""
+    head = int(_rpc_call("eth_blockNumber", [], EVM_RPC_URL)["result"], 16)
+    safe = head - CHAIN_CONFIRMATIONS
+    if cursor < 0:
+        cursor = safe
+    if safe <= cursor:
+        return cursor, []
+    start, end = cursor + 1, min(safe, cursor + CHAIN_MAX_BLOCKS_PER_POLL)
+    calls: List[Tuple[str, List[Any]]] = [("eth_getBlockByNumber", [hex(n), True]) for n in range(start, end + 1)]
+    calls += [("eth_getLogs", [f]) for f in screener.log_filters(start, end)]
+    results = _rpc_batch(calls, EVM_RPC_URL)
+    for result in results:
+        if "error" in result:
+            raise RuntimeError(f"EVM RPC error for blocks {start}-{end}: {result['error']}")
+    n_blocks = end - start + 1
+    blocks = [r.get("result") for r in results[:n_blocks]]
+    logs = [log for r in results[n_blocks:] for log in (r.get("result") or [])]
+    flagged = screener.screen(blocks, logs)
+    print(f"[{_now_iso()}] Blocks {start}-{end}: {sum(len(b.get('transactions', [])) for b in blocks if b)} txs, {len(flagged)} flagged")
+    return end, [_chain_tx_alert(tx) for tx in flagged]
+
+
+def _run_chain(queue: SubmissionQueue) -> None:
+    if not PROTECTED_ADDRESSES:
+        raise RuntimeError("Set PROTECTED_ADDRESSES to the protocol contracts to watch.")
+    screener = ChainPrescreener(PROTECTED_ADDRESSES, CHAIN_SCORE_THRESHOLD)
+    mirror = PatternMirror(PATTERN_MIRROR_FILE, CONTRACT_ADDRESS)
+    last_sync = 0.0
+    cursor = _load_chain_cursor()
+    print(f"[{_now_iso()}] Chain monitor started at block {cursor if cursor >= 0 else 'head'}.")
+
+    while True:
+        caught_up = True
+        started = time.monotonic()
+        try:
+            if time.time() - last_sync >= PATTERN_SYNC_SECONDS:
+                _sync_patterns(mirror)
+                last_sync = time.time()
+            new_cursor, candidates = _chain_step(screener, cursor)
+            caught_up = new_cursor - cursor < CHAIN_MAX_BLOCKS_PER_POLL
+            alerts = _label_alerts(mirror, candidates, CHAIN_NEEDS_AI_MIN_SCORE)
+            _submit_alerts(queue, alerts)
+            if new_cursor != cursor:
+                cursor = new_cursor
+                _save_chain_cursor(cursor)
+            _M_SUBMIT_DEPTH.set(queue.depth())
+            _end_cycle("chain", started, CHAIN_POLL_SECONDS, len(candidates), len(alerts), [CHAIN_STATE_FILE, DEAD_LETTER_FILE])
+        except Exception as e:
+            print(f"[{_now_iso()}] Chain loop error: {e}")
+
+        if caught_up:
+            time.sleep(CHAIN_POLL_SECONDS)
+
+
+def _run_news(queue: SubmissionQueue) -> None:
+    seen = _load_seen_store()
+    feed_cache = FeedCache(FEED_CACHE_FILE)
+    scheduler = FeedScheduler(
+        POLL_SECONDS, FEED_MIN_POLL_SECONDS, FEED_MAX_POLL_SECONDS, FEED_BACKOFF_FACTOR, FEED_BURST_ALERTS
+    )
+    stories = StoryClusterer(STORY_WINDOW_SECONDS, STORY_SIMILARITY)
+    mirror = PatternMirror(PATTERN_MIRROR_FILE, CONTRACT_ADDRESS)
+    last_sync = 0.0
     print(f"[{_now_iso()}] Monitor started.")
 
     while True:
+        started = time.monotonic()
         try:
-            sources = _news_sources()
-            new_items = []
-            for src in sources:
-                try:
-                    items = _fetch_rss(src)
-                    new_items.extend(items)
-                except Exception as e:
-                    print(f"[{_now_iso()}] RSS error: {src} -> {e}")
-
-            for item in new_items:
-                item_id = _hash_id(item.get("id", "") + item.get("link", ""))
-                if item_id in seen:
+            if time.time() - last_sync >= PATTERN_SYNC_SECONDS:
+                _sync_patterns(mirror)
+                last_sync = time.time()
+            due = scheduler.due(_news_sources())
+            results = _fetch_all(due, feed_cache, seen, scheduler)
+            clusters: Dict[int, List[Tuple[int, List[str], Dict[str, str]]]] = {}
+            validators: Dict[str, Dict[str, str]] = {}
+            cycle_items = 0
+            scoring_started = time.monotonic()
+
+            for src in due:
+                if src not in results:
+                    scheduler.record(src, failed=True)
                     continue
-                seen[item_id] = _now_iso()
-
-                text = f"{item.get('title','')} {item.get('link','')} {item.get('pub_date','')}"
-                score, hits = _score_text(text)
-                if score >= SCORE_THRESHOLD:
-                    tx_hash = "0x" + _hash_id(item.get("link", item_id))[:64]
-                    tx_data = (
-                        f"news_alert title='{item.get('title','')}' "
-                        f"link='{item.get('link','')}' "
-                        f"pub_date='{item.get('pub_date','')}' "
-                        f"score={score} hits={hits}"
-                    )
-                    print(f"[{_now_iso()}] Alert score={score} hits={hits}")
-                    _call_analyze(tx_data, tx_hash)
-
-            state["seen"] = seen
-            _save_state(state)
+                feed_items, feed_validators = results[src]
+                if feed_validators is not None:
+                    validators[src] = feed_validators
+                new_count = 0
+                feed_alerts = 0
+                for item in feed_items or []:
+                    item_id = _item_id(item)
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    new_count += 1
+
+                    text = f"{item.get('title','')} {item.get('link','')} {item.get('pub_date','')}"
+                    score, hits = _score_text(text)
+                    if score >= SCORE_THRESHOLD:
+                        print(f"[{_now_iso()}] Alert score={score} hits={hits}")
+                        feed_alerts += 1
+                        cluster_id, is_new = stories.assign(item.get("title", ""))
+                        if cluster_id in clusters:
+                            clusters[cluster_id].append((score, hits, item))
+                        elif is_new:
+                            clusters[cluster_id] = [(score, hits, item)]
+                        else:
+                            print(f"[{_now_iso()}] Duplicate of an already submitted story, skipped: {item.get('link','')}")
+                cycle_items += new_count
+                interval = scheduler.record(src, new_count, feed_alerts)
+                print(f"[{_now_iso()}] Next poll of {src} in {interval:.0f}s")
+
+            alerts = _label_clusters(stories, mirror, clusters, NEWS_NEEDS_AI_MIN_SCORE)
+            _M_SCORING.observe(time.monotonic() - scoring_started)
+            _submit_alerts(queue, alerts)
+            seen.flush()
+            # Only now are this cycle's items safe to answer with a 304 next time.
+            for src, v in validators.items():
+                feed_cache.remember(src, v["digest"], v["etag"], v["last_modified"])
+            feed_cache.save()
+            _M_SUBMIT_DEPTH.set(queue.depth())
+            _end_cycle(
+                "news", started, POLL_SECONDS, cycle_items, len(alerts),
+                [SEEN_FILE, seen.snapshot_path, FEED_CACHE_FILE, DEAD_LETTER_FILE],
+            )
         except Exception as e:
             print(f"[{_now_iso()}] Loop error: {e}")
 
-        time.sleep(POLL_SECONDS)
+        time.sleep(scheduler.seconds_until_next())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Watch for exploits and submit them to HackDetection.")
+    parser.add_argument(
+        "--mode",
+        choices=["news", "chain"],
+        default="news",
+        help="news: poll RSS feeds (default); chain: screen EVM blocks for PROTECTED_ADDRESSES.",
+    )
+    args = parser.parse_args()
+    if METRICS_PORT:
+        start_metrics_server(_METRICS, METRICS_PORT)
+        print(f"[{_now_iso()}] Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+    # Turn SIGTERM (e.g. from bot_supervisor) into a normal exit so queued alerts are spooled.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    queue = _build_submit_queue()
+    try:
+        if args.mode == "chain":
+            _run_chain(queue)
+        else:
+            _run_news(queue)
+    finally:
+        queue.close()
 
 
 if __name__ == "__main__":
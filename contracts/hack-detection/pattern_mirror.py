@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; a scan costs O(len(text) + matches) however many patterns exist.
+
+    Patterns can be added at any time; failure links are rebuilt lazily on the
+    next scan after a change.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[Any]] = [[]]
+        self._fail: List[int] = [0]
+        self._out_link: List[int] = [0]
+        self._built = True
+
+    def add(self, word: str, key: Any) -> None:
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._out.append([])
+                self._fail.append(0)
+                self._out_link.append(0)
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append(key)
+        self._built = False
+
+    def _build(self) -> None:
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._out_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                f = self._goto[f].get(ch, 0)
+                self._fail[child] = f
+                self._out_link[child] = f if self._out[f] else self._out_link[f]
+                queue.append(child)
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Any]:
+        """Yield the key of every pattern occurring in ``text`` (once per occurrence)."""
+        if not self._built:
+            self._build()
+        goto, fail, out, out_link = self._goto, self._fail, self._out, self._out_link
+        yield from out[0]
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            n = node
+            while n:
+                yield from out[n]
+                n = out_link[n]
+
+
+def parse_patterns(data: Any) -> List[Tuple[int, str, str]]:
+    """Turn a ``get_attack_patterns`` RPC result into (pattern_id, signature, description) rows."""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except Exception:
+            return []
+    rows: List[Tuple[int, str, str]] = []
+    if isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            try:
+                pattern_id = int(item.get("pattern_id"))
+            except Exception:
+                continue
+            rows.append((pattern_id, str(item.get("signature", "")), str(item.get("description", ""))))
+    return rows
+
+
+# fetch_page(start, limit) -> rows with pattern_id in [start, start + limit), as from get_attack_patterns_from.
+FetchPage = Callable[[int, int], List[Tuple[int, str, str]]]
+
+_MISSING_METHOD_RE = re.compile(
+    r"method not found|unknown method|no such method|method .*(?:does not exist|not found)|has no attribute",
+    re.IGNORECASE,
+)
+
+
+class PageMethodMissing(Exception):
+    """The contract has no ``get_attack_patterns_from``; only ``get_attack_patterns`` can be read."""
+
+
+def is_missing_method(error: Any) -> bool:
+    """True if a JSON-RPC ``error`` member says the called method does not exist.
+
+    Other errors (reverts, timeouts, overloaded nodes) are not a reason to
+    fall back to a full pattern download.
+    """
+    if isinstance(error, dict):
+        if error.get("code") == -32601:
+            return True
+        error = f"{error.get('message', '')} {error.get('data', '')}"
+    return bool(_MISSING_METHOD_RE.search(str(error)))
+
+
+class PatternMirror:
+    """Local copy of HackDetection's ``attack_patterns`` with the contract's match rule.
+
+    ``match`` returns the same pattern ``analyze_transaction`` would: the lowest
+    ``pattern_id`` whose signature is a substring of ``tx_data``.
+    """
+
+    def __init__(self, path: str, source: str = ""):
+        self.path = path
+        # Contract address the cache belongs to; a file written for another one is ignored.
+        self.source = source
+        self.patterns: Dict[int, Tuple[str, str]] = {}
+        self._matcher = AhoCorasick()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("source", "") == source:
+                self.apply([tuple(row) for row in data.get("patterns", [])])
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            print(f"Warning: pattern mirror {path} unreadable ({exc}); starting empty.")
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    @property
+    def max_id(self) -> int:
+        return max(self.patterns) if self.patterns else -1
+
+    def apply(self, rows: List[Tuple[int, str, str]]) -> int:
+        """Add rows not mirrored yet; return how many were added."""
+        added = 0
+        for pattern_id, signature, description in rows:
+            if pattern_id in self.patterns:
+                continue
+            self.patterns[pattern_id] = (signature, description)
+            self._matcher.add(signature, pattern_id)
+            added += 1
+        return added
+
+    def reset(self) -> None:
+        self.patterns = {}
+        self._matcher = AhoCorasick()
+
+    def sync(self, fetch_page: FetchPage, page_size: int = 200) -> Tuple[int, bool]:
+        """Pull patterns newer than ``max_id`` page by page; return (added, resynced).
+
+        Pattern IDs are append-only array indexes, so the cached tail is
+        re-read as the first row of the first page. If it is gone or has a
+        different signature the contract was reset or redeployed, and the
+        mirror is rebuilt from ID 0.
+        """
+        page_size = max(1, page_size)
+        resynced = False
+        start = self.max_id if self.patterns else 0
+        rows = fetch_page(start, page_size)
+        if self.patterns:
+            tail = self.patterns[start][0]
+            if not rows or rows[0][0] != start or rows[0][1] != tail:
+                self.reset()
+                resynced = True
+                start = 0
+                rows = fetch_page(start, page_size)
+        added = 0
+        while True:
+            added += self.apply(rows)
+            if len(rows) < page_size:
+                return added, resynced
+            start += len(rows)
+            rows = fetch_page(start, page_size)
+
+    def match(self, tx_data: str) -> Optional[Tuple[int, str, str]]:
+        best: Optional[int] = None
+        for pattern_id in self._matcher.iter_matches(tx_data):
+            if best is None or pattern_id < best:
+                best = pattern_id
+        if best is None:
+            return None
+        signature, description = self.patterns[best]
+        return best, signature, description
+
+    def save(self) -> None:
+        rows = [[pid, sig, desc] for pid, (sig, desc) in sorted(self.patterns.items())]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "patterns": rows}, f)
+        os.replace(tmp_path, self.path)
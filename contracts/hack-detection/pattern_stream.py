@@ -0,0 +1,242 @@
+import codecs
+import itertools
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_WS = " \t\r\n"
+_NUMBER_CHARS = "0123456789+-.eE"
+# A single JSON value larger than this is treated as a malformed feed rather
+# than buffered without bound.
+MAX_VALUE_CHARS = 4 * 1024 * 1024
+
+
+def iter_text(stream: Any, chunk_size: int = 65536) -> Iterator[str]:
+    """Decode a binary ``read()``-able stream as UTF-8 text, chunk by chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(keepends=True)
+        # The last piece may continue in the next chunk unless it ends a line.
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def record_from_json(item: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(item, str):
+        return {"signature": item, "description": "Imported from feed"}
+    if not isinstance(item, dict):
+        return None
+    return {
+        "signature": item.get("signature") or item.get("pattern") or item.get("ioc") or "",
+        "description": item.get("description") or item.get("title") or "Imported from feed",
+        "confidence": item.get("confidence"),
+    }
+
+
+def record_from_line(line: str) -> Optional[Dict[str, Any]]:
+    # Line feed: "signature|description|confidence"
+    row = line.strip()
+    if not row or row.startswith("#"):
+        return None
+    parts = [p.strip() for p in row.split("|")]
+    if len(parts) == 1:
+        return {"signature": parts[0], "description": "Imported from feed"}
+    if len(parts) == 2:
+        return {"signature": parts[0], "description": parts[1]}
+    try:
+        conf = int(parts[2])
+    except Exception:
+        conf = None
+    return {"signature": parts[0], "description": parts[1], "confidence": conf}
+
+
+class _JsonReader:
+    """Pulls JSON tokens and values from a stream of text chunks."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ""
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, want: int) -> bool:
+        """Read until at least ``want`` unconsumed chars are buffered; False at end of stream."""
+        parts = [self._buf[self._pos:]]
+        have = len(parts[0])
+        grew = False
+        while have < want:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            have += len(chunk)
+            grew = True
+        self._buf = "".join(parts)
+        self._pos = 0
+        return grew
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(1):
+                return ""
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(f"expected {token!r}, found {self.peek()!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            remaining = len(self._buf) - self._pos
+            try:
+                val, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if remaining > MAX_VALUE_CHARS or not self._fill(max(2 * remaining, 1)):
+                    raise
+                continue
+            # A value ending at the chunk edge, or a number cut mid-way ("1." of "1.5"),
+            # may continue in the next chunk.
+            cut = end == len(self._buf) or (
+                isinstance(val, (int, float)) and not isinstance(val, bool) and self._buf[end] in _NUMBER_CHARS
+            )
+            if cut and self._fill(len(self._buf) - self._pos + 1):
+                continue
+            self._pos = end
+            return val
+
+    def array_items(self) -> Iterator[Any]:
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"expected ',' or ']', found {sep!r}")
+
+
+def iter_json_items(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield the items of a JSON pattern feed without loading the whole document.
+
+    A top-level array yields its elements. A top-level object yields the
+    elements of its ``"patterns"`` array, or the object itself if it has no
+    such array. This matches ``json.loads`` followed by the old extractor.
+    """
+    reader = _JsonReader(iter(chunks))
+    first = reader.peek()
+    if first == "[":
+        reader.expect("[")
+        yield from reader.array_items()
+        return
+    if first != "{":
+        reader.value()
+        return
+    reader.expect("{")
+    fields: Dict[str, Any] = {}
+    streamed = False
+    if reader.peek() == "}":
+        reader.expect("}")
+    else:
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "patterns" and not streamed and reader.peek() == "[":
+                reader.expect("[")
+                yield from reader.array_items()
+                streamed = True
+            else:
+                fields[key] = reader.value()
+            sep = reader.peek()
+            if sep not in (",", "}"):
+                raise ValueError(f"expected ',' or '}}', found {sep!r}")
+            reader.expect(sep)
+            if sep == "}":
+                break
+    if not streamed:
+        yield fields
+
+
+class _Replay:
+    """Iterator over chunks that remembers what it served until ``forget()``."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self.served: Optional[List[str]] = []
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            if self.served is not None:
+                self.served.append(chunk)
+            yield chunk
+
+    def forget(self) -> None:
+        self.served = None
+
+
+def iter_records(chunks: Iterable[str], content_type: str = "") -> Iterator[Dict[str, Any]]:
+    """Yield raw pattern records (signature, description, confidence) from a feed as it streams in.
+
+    JSON feeds (by content type or a leading ``{``/``[``) are parsed
+    incrementally. Anything else is read line by line. If JSON parsing fails
+    before the first record, the feed is re-read as lines. A failure later on
+    raises after the records already yielded.
+    """
+    source = iter(chunks)
+    head: List[str] = []
+    for chunk in source:
+        head.append(chunk)
+        if chunk.strip():
+            break
+    start = "".join(head).lstrip()[:1]
+
+    def rest() -> Iterator[str]:
+        yield from head
+        yield from source
+
+    if "json" not in content_type and start not in ("{", "["):
+        for line in iter_lines(rest()):
+            record = record_from_line(line)
+            if record is not None:
+                yield record
+        return
+
+    replay = _Replay(rest())
+    items = iter_json_items(replay)
+    try:
+        first = list(itertools.islice(items, 1))
+    except ValueError:
+        for line in iter_lines(itertools.chain(replay.served or [], source)):
+            record = record_from_line(line)
+            if record is not None:
+                yield record
+        return
+    replay.forget()
+    for item in itertools.chain(first, items):
+        record = record_from_json(item)
+        if record is not None:
+            yield record
@@ -1,11 +1,25 @@
 import json
 import os
 import time
-import urllib.request
 import argparse
+import hashlib
+import heapq
+import itertools
 import re
+import tempfile
+import threading
+import urllib.error
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from urllib.parse import urlparse
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from feed_cache import FeedCache
+from http_pool import HTTPPool
+from metrics import Registry, start_metrics_server
+from pattern_mirror import PageMethodMissing, PatternMirror, is_missing_method, parse_patterns
+from pattern_stream import iter_records, iter_text
+from signature_index import SignatureIndex, similar
 
 
 RPC_URL = os.getenv("GENLAYER_RPC_URL", "https://studio.genlayer.com/api")
@@ -20,7 +34,11 @@ PATTERN_FEED_URLS = [
 ]
 PATTERN_MIN_CONFIDENCE = int(os.getenv("PATTERN_MIN_CONFIDENCE", "70"))
 PATTERN_MAX_PER_RUN = int(os.getenv("PATTERN_MAX_PER_RUN", "10"))
+# Jaccard similarity (word tokens or character trigrams) at which a candidate
+# counts as a near-duplicate of an on-chain or already selected signature; 0 disables.
+PATTERN_DUPLICATE_SIMILARITY = float(os.getenv("PATTERN_DUPLICATE_SIMILARITY", "0.8"))
 PATTERN_DRY_RUN = os.getenv("PATTERN_DRY_RUN", "1") == "1"
+PATTERN_SUBMIT_BATCH_SIZE = int(os.getenv("PATTERN_SUBMIT_BATCH_SIZE", "50"))
 PATTERN_SOURCE_ALLOWLIST = [
     d.strip().lower()
     for d in os.getenv("PATTERN_SOURCE_ALLOWLIST", "").split(",")
@@ -30,6 +48,35 @@ PATTERN_SIGNATURE_REGEX = os.getenv(
     "PATTERN_SIGNATURE_REGEX",
     r"^[a-zA-Z0-9_\-:.()/,\s]{6,180}$",
 )
+# On-chain signatures are cached by pattern_id; each run only reads newer ones.
+PATTERN_CACHE_FILE = os.getenv("PATTERN_CACHE_FILE", "pattern_updater_onchain.json")
+PATTERN_SYNC_PAGE_SIZE = int(os.getenv("PATTERN_SYNC_PAGE_SIZE", "200"))
+# ETag / Last-Modified / body digest of each feed as of the last run that fully
+# consumed it; unchanged feeds are skipped.
+PATTERN_FEED_CACHE_FILE = os.getenv("PATTERN_FEED_CACHE_FILE", "pattern_updater_feed_cache.json")
+HTTP_POOL_MAX_PER_HOST = int(os.getenv("HTTP_POOL_MAX_PER_HOST", "4"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+# Feeds are fetched concurrently: at most PATTERN_FETCH_WORKERS in total and
+# PATTERN_FETCH_PER_HOST per hostname, and the whole fetch phase of a run is
+# bounded by PATTERN_RUN_DEADLINE_SECONDS.
+PATTERN_FETCH_WORKERS = int(os.getenv("PATTERN_FETCH_WORKERS", "8"))
+PATTERN_FETCH_PER_HOST = int(os.getenv("PATTERN_FETCH_PER_HOST", "2"))
+PATTERN_RUN_DEADLINE_SECONDS = float(os.getenv("PATTERN_RUN_DEADLINE_SECONDS", "120"))
+
+PATTERN_METRICS_PORT = int(os.getenv("PATTERN_METRICS_PORT", "0"))
+
+_HTTP = HTTPPool(max_per_host=HTTP_POOL_MAX_PER_HOST, timeout=HTTP_TIMEOUT_SECONDS)
+
+_METRICS = Registry()
+_M_FEED_FETCH = _METRICS.histogram("pattern_updater_feed_fetch_seconds", "Feed fetch latency.", ["feed", "outcome"])
+_M_EXTRACTED = _METRICS.gauge("pattern_updater_extracted", "Candidate patterns extracted in the last run.")
+_M_SELECTED = _METRICS.gauge("pattern_updater_selected", "Patterns selected for submission in the last run.")
+_M_SUBMITTED = _METRICS.counter("pattern_updater_submitted_total", "Patterns submitted on-chain.")
+_M_RPC = _METRICS.histogram("pattern_updater_rpc_seconds", "JSON-RPC round-trip latency.", ["method"])
+_M_RPC_ERRORS = _METRICS.counter("pattern_updater_rpc_errors_total", "Failed JSON-RPC requests.", ["method"])
+_M_RUN = _METRICS.histogram("pattern_updater_run_seconds", "Duration of one updater run.")
+_M_INTERVAL = _METRICS.gauge("pattern_updater_interval_seconds", "Configured scheduler interval.")
+_M_OVERRUNS = _METRICS.counter("pattern_updater_run_overruns_total", "Runs that took longer than the interval.")
 
 
 def _rpc_call(method: str, params: List[Any]) -> Dict[str, Any]:
@@ -44,10 +91,17 @@ def _rpc_call(method: str, params: List[Any]) -> Dict[str, Any]:
     if API_KEY:
         headers["Authorization"] = f"Bearer {API_KEY}"
         headers["x-api-key"] = API_KEY
-    req = urllib.request.Request(RPC_URL, data=data, headers=headers)
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read().decode("utf-8")
-    return json.loads(raw)
+    rpc_method = params[0].get("method", method) if params and isinstance(params[0], dict) else method
+    start = time.monotonic()
+    try:
+        with _HTTP.request("POST", RPC_URL, body=data, headers=headers) as resp:
+            raw = resp.read().decode("utf-8")
+        return json.loads(raw)
+    except Exception:
+        _M_RPC_ERRORS.inc(method=rpc_method)
+        raise
+    finally:
+        _M_RPC.observe(time.monotonic() - start, method=rpc_method)
 
 
 def _call_view(method: str, args: List[Any]) -> Dict[str, Any]:
@@ -62,12 +116,111 @@ def _call_write(method: str, args: List[Any]) -> Dict[str, Any]:
     return _rpc_call(CALL_WRITE, [tx_obj])
 
 
-def _fetch_text(url: str) -> Tuple[str, str]:
-    req = urllib.request.Request(url, headers={"User-Agent": "PatternUpdater/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        content_type = (resp.headers.get("Content-Type") or "").lower()
-        body = resp.read().decode("utf-8", errors="replace")
-    return body, content_type
+# Feed bodies are spooled (in memory up to this size, then on disk) while
+# they are hashed, so unchanged feeds are never parsed.
+_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def _stream_feed(
+    url: str, deadline: float, selection: "_Selection", cache: FeedCache
+) -> Optional[Tuple[int, Dict[str, str]]]:
+    """Feed one feed's records into ``selection``.
+
+    Returns (records, cache validators), or None when the feed is unchanged
+    since it was last fully consumed (304, or same body digest).
+    """
+    timeout = max(0.1, min(HTTP_TIMEOUT_SECONDS, deadline - time.monotonic()))
+    headers = {"User-Agent": "PatternUpdater/1.0"}
+    headers.update(cache.request_headers(url))
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY)
+    with spool:
+        try:
+            with _HTTP.request("GET", url, headers=headers, timeout=timeout) as resp:
+                content_type = (resp.headers.get("Content-Type") or "").lower()
+                etag = resp.headers.get("ETag", "")
+                last_modified = resp.headers.get("Last-Modified", "")
+                sha = hashlib.sha256()
+                while True:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError("run deadline reached mid-feed")
+                    chunk = resp.read(65536)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+                    spool.write(chunk)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                cache.not_modified(url)
+                return None
+            raise
+        validators = {"digest": sha.hexdigest(), "etag": etag, "last_modified": last_modified}
+        if not cache.changed(url, validators["digest"]):
+            cache.remember(url, **validators)
+            return None
+        spool.seek(0)
+        count = 0
+        for record in iter_records(iter_text(spool), content_type):
+            if time.monotonic() > deadline:
+                raise TimeoutError("run deadline reached mid-feed")
+            selection.offer(record, url)
+            count += 1
+    return count, validators
+
+
+FeedResult = Tuple[str, Any, float, Optional[BaseException]]
+
+
+def _timed(handle: Callable[[str], Any], url: str) -> Tuple[Any, float]:
+    start = time.monotonic()
+    return handle(url), time.monotonic() - start
+
+
+def _fetch_feeds(urls: List[str], deadline: float, handle: Callable[[str], Any]) -> Iterator[FeedResult]:
+    """Run ``handle(url)`` for each feed concurrently and yield (url, result, seconds, error) as each completes.
+
+    A feed is only handed to a worker when its hostname has a free slot, so a
+    slow host never ties up the whole pool. Feeds not finished by ``deadline``
+    are yielded with a TimeoutError.
+    """
+    per_host = max(1, min(PATTERN_FETCH_PER_HOST, HTTP_POOL_MAX_PER_HOST))
+    queued: Dict[str, Deque[str]] = {}
+    for url in urls:
+        queued.setdefault((urlparse(url).hostname or "").lower(), deque()).append(url)
+    active: Dict[str, int] = {host: 0 for host in queued}
+    running: Dict[Future, Tuple[str, str]] = {}
+    workers = max(1, min(PATTERN_FETCH_WORKERS, len(urls)))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    started_at: Dict[str, float] = {}
+    try:
+        while True:
+            for host, pending in queued.items():
+                while pending and active[host] < per_host and len(running) < workers:
+                    url = pending.popleft()
+                    active[host] += 1
+                    started_at[url] = time.monotonic()
+                    running[pool.submit(_timed, handle, url)] = (url, host)
+            if not running:
+                return
+            remaining = deadline - time.monotonic()
+            done, _ = wait(running, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                url, host = running.pop(fut)
+                active[host] -= 1
+                try:
+                    result, elapsed = fut.result()
+                    yield url, result, elapsed, None
+                except Exception as exc:
+                    yield url, None, time.monotonic() - started_at[url], exc
+        now = time.monotonic()
+        for url, _ in running.values():
+            yield url, None, now - started_at[url], TimeoutError("run deadline reached")
+        for pending in queued.values():
+            for url in pending:
+                yield url, None, 0.0, TimeoutError("run deadline reached before fetch started")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def _is_source_allowed(url: str) -> bool:
@@ -111,90 +264,159 @@ def _heuristic_confidence(signature: str, description: str) -> int:
     return min(score, 100)
 
 
-def _extract_patterns_from_json(obj: Any) -> List[Dict[str, Any]]:
-    patterns: List[Dict[str, Any]] = []
-    if isinstance(obj, dict):
-        if isinstance(obj.get("patterns"), list):
-            items = obj["patterns"]
-        else:
-            items = [obj]
-    elif isinstance(obj, list):
-        items = obj
-    else:
-        items = []
-
-    for item in items:
-        if isinstance(item, str):
-            patterns.append({"signature": item, "description": "Imported from feed"})
-            continue
-        if not isinstance(item, dict):
-            continue
-        signature = item.get("signature") or item.get("pattern") or item.get("ioc") or ""
-        description = item.get("description") or item.get("title") or "Imported from feed"
+class _Selection:
+    """Vets feed records as they stream in and keeps only the best ``limit`` candidates.
+
+    Records are normalized, regex-checked, deduplicated against on-chain and
+    kept signatures, and confidence-filtered one at a time. A record that
+    would make the cut is then checked for near-duplicates (see
+    ``SignatureIndex``). One that resembles an on-chain pattern is rejected,
+    and one that resembles a kept candidate is merged into it, keeping the
+    more confident of the two. Feeds call ``offer`` from worker threads;
+    ``close`` rejects late offers once the run deadline has passed. The
+    on-chain set is loaded on the first record that needs it, so a run where
+    every feed is unchanged never reads the chain.
+    """
+
+    def __init__(
+        self,
+        compiled_re: re.Pattern,
+        load_onchain: Callable[[], set],
+        limit: int,
+        similarity: float = 0.0,
+    ):
+        self.compiled_re = compiled_re
+        self.limit = limit
+        self.similarity = similarity
+        # Feeds that had a vetted candidate left out because of ``limit``.
+        self.cut: set = set()
+        self._load_onchain = load_onchain
+        self._onchain: Optional[set] = None
+        self._onchain_index: Optional[SignatureIndex] = None
+        self._kept: set = set()
+        self._heap: List[Tuple[int, int, str, str, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._onchain_lock = threading.Lock()
+        self._closed = False
+
+    def _onchain_signatures(self) -> set:
+        with self._onchain_lock:
+            if self._onchain is None:
+                self._onchain = self._load_onchain()
+            return self._onchain
+
+    def _onchain_duplicate(self, signature: str) -> Optional[Tuple[str, float]]:
+        onchain = self._onchain_signatures()
+        with self._onchain_lock:
+            if self._onchain_index is None:
+                started = time.monotonic()
+                self._onchain_index = SignatureIndex(onchain, self.similarity)
+                print(f"Indexed {len(onchain)} on-chain signatures in {time.monotonic() - started:.2f}s")
+            index = self._onchain_index
+        return index.find(signature)
+
+    def offer(self, item: Dict[str, Any], feed: str = "") -> None:
+        signature = _normalize_signature(str(item.get("signature", "")))
+        description = _normalize_description(str(item.get("description", "")))
+        if not signature:
+            return
+        if not _is_valid_signature(signature, self.compiled_re):
+            print(f"Rejected signature by regex: {signature}")
+            return
+        if signature in self._onchain_signatures():
+            return
         confidence = item.get("confidence")
-        patterns.append(
-            {
-                "signature": signature,
-                "description": description,
-                "confidence": confidence,
-            }
-        )
-    return patterns
-
-
-def _extract_patterns(raw_text: str, content_type: str) -> List[Dict[str, Any]]:
-    candidates: List[Dict[str, Any]] = []
-    # JSON feed: either [{"signature":"...","description":"..."}] or {"patterns":[...]}
-    if "json" in content_type or raw_text.strip().startswith("{") or raw_text.strip().startswith("["):
+        if confidence is None:
+            confidence = _heuristic_confidence(signature, description)
         try:
-            obj = json.loads(raw_text)
-            return _extract_patterns_from_json(obj)
+            confidence = int(confidence)
         except Exception:
-            pass
-
-    # Line feed: "signature|description|confidence"
-    for line in raw_text.splitlines():
-        row = line.strip()
-        if not row or row.startswith("#"):
-            continue
-        parts = [p.strip() for p in row.split("|")]
-        if len(parts) == 1:
-            candidates.append({"signature": parts[0], "description": "Imported from feed"})
-        elif len(parts) == 2:
-            candidates.append({"signature": parts[0], "description": parts[1]})
-        else:
-            try:
-                conf = int(parts[2])
-            except Exception:
-                conf = None
-            candidates.append(
-                {"signature": parts[0], "description": parts[1], "confidence": conf}
-            )
-    return candidates
-
-
-def _get_onchain_signatures() -> set:
+            confidence = 0
+        if confidence < PATTERN_MIN_CONFIDENCE:
+            return
+        with self._lock:
+            if self._closed:
+                raise TimeoutError("run deadline reached")
+            # Dedup only against kept candidates so memory stays bounded by ``limit``.
+            if signature in self._kept:
+                return
+            # Ties keep the earlier record, as the old stable sort did.
+            entry = (confidence, -next(self._seq), signature, description, feed)
+            if len(self._heap) >= self.limit and not (self._heap and entry > self._heap[0]):
+                self.cut.add(feed)
+                return
+            if self.similarity > 0:
+                dup = self._onchain_duplicate(signature)
+                if dup is not None:
+                    print(f"Rejected near-duplicate of on-chain '{dup[0]}' ({dup[1]:.2f}): {signature}")
+                    return
+                twin = next((e for e in self._heap if similar(signature, e[2], self.similarity)), None)
+                if twin is not None:
+                    if entry < twin:
+                        return
+                    self._heap.remove(twin)
+                    heapq.heapify(self._heap)
+                    self._kept.discard(twin[2])
+                    print(f"Merged near-duplicate '{twin[2]}' into '{signature}'")
+            if len(self._heap) < self.limit:
+                heapq.heappush(self._heap, entry)
+            else:
+                dropped = heapq.heapreplace(self._heap, entry)
+                self._kept.discard(dropped[2])
+                self.cut.add(dropped[4])
+            self._kept.add(signature)
+
+    def close(self) -> List[Tuple[int, str, str]]:
+        """Stop accepting records and return the selection, best first."""
+        with self._lock:
+            self._closed = True
+            return [(conf, sig, desc) for conf, _, sig, desc, _ in sorted(self._heap, reverse=True)]
+
+    def kept_from(self, feed: str) -> List[str]:
+        with self._lock:
+            return [entry[2] for entry in self._heap if entry[4] == feed]
+
+
+def _fetch_pattern_page(start: int, limit: int) -> List[Tuple[int, str, str]]:
+    res = _call_view("get_attack_patterns_from", [start, limit])
+    if "error" in res:
+        if is_missing_method(res["error"]):
+            raise PageMethodMissing(f"get_attack_patterns_from unavailable: {res['error']}")
+        raise RuntimeError(f"get_attack_patterns_from failed: {res['error']}")
+    return parse_patterns(res.get("result"))
+
+
+def _get_onchain_signatures(strict: bool = False) -> set:
+    """Normalized signatures on-chain, read through the local pattern cache.
+
+    A failed sync falls back to the cached patterns, unless ``strict`` is set,
+    in which case the error is raised.
+    """
+    cache = PatternMirror(PATTERN_CACHE_FILE, CONTRACT_ADDRESS)
     try:
-        res = _call_view("get_attack_patterns", [])
-        data = res.get("result")
-        if data is None:
-            return set()
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except Exception:
-                return set()
-        seen = set()
-        if isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict):
-                    sig = _normalize_signature(str(item.get("signature", "")))
-                    if sig:
-                        seen.add(sig)
-        return seen
+        try:
+            added, resynced = cache.sync(_fetch_pattern_page, PATTERN_SYNC_PAGE_SIZE)
+        except PageMethodMissing as exc:
+            # Contracts deployed before get_attack_patterns_from only have the full view.
+            print(f"Paginated pattern read unavailable ({exc}); reading all on-chain patterns.")
+            res = _call_view("get_attack_patterns", [])
+            cache.reset()
+            added, resynced = cache.apply(parse_patterns(res.get("result"))), True
+        if added or resynced:
+            cache.save()
+        note = ", full resync" if resynced else ""
+        print(f"On-chain patterns: {len(cache)} cached (+{added} new{note})")
     except Exception as exc:
-        print(f"Warning: could not read on-chain patterns ({exc}). Continuing with empty set.")
-        return set()
+        if strict:
+            raise
+        print(f"Warning: could not sync on-chain patterns ({exc}). Continuing with {len(cache)} cached patterns.")
+    seen = set()
+    for signature, _ in cache.patterns.values():
+        sig = _normalize_signature(signature)
+        if sig:
+            seen.add(sig)
+    return seen
 
 
 def _run_once(compiled_re: re.Pattern) -> None:
@@ -203,62 +425,125 @@ def _run_once(compiled_re: re.Pattern) -> None:
     if not PATTERN_FEED_URLS:
         raise RuntimeError("Set PATTERN_FEED_URLS to one or more comma-separated feed URLs.")
 
-    onchain = _get_onchain_signatures()
-    local_seen = set()
-    candidates: List[Tuple[int, str, str]] = []
+    selection = _Selection(compiled_re, _get_onchain_signatures, PATTERN_MAX_PER_RUN, PATTERN_DUPLICATE_SIMILARITY)
+    cache = FeedCache(PATTERN_FEED_CACHE_FILE)
+    extracted_total = 0
 
+    feeds = []
     for url in PATTERN_FEED_URLS:
         if not _is_source_allowed(url):
             print(f"Feed blocked (not in allowlist): {url}")
             continue
-        try:
-            raw_text, content_type = _fetch_text(url)
-            extracted = _extract_patterns(raw_text, content_type)
-            print(f"Feed {url}: extracted {len(extracted)} candidate patterns")
-            for item in extracted:
-                signature = _normalize_signature(str(item.get("signature", "")))
-                description = _normalize_description(str(item.get("description", "")))
-                if not signature:
-                    continue
-                if not _is_valid_signature(signature, compiled_re):
-                    print(f"Rejected signature by regex: {signature}")
-                    continue
-                if signature in onchain or signature in local_seen:
-                    continue
-                confidence = item.get("confidence")
-                if confidence is None:
-                    confidence = _heuristic_confidence(signature, description)
-                try:
-                    confidence = int(confidence)
-                except Exception:
-                    confidence = 0
-                if confidence < PATTERN_MIN_CONFIDENCE:
-                    continue
-                local_seen.add(signature)
-                candidates.append((confidence, signature, description))
-        except Exception as exc:
-            print(f"Feed error: {url} -> {exc}")
+        feeds.append(url)
+
+    deadline = time.monotonic() + PATTERN_RUN_DEADLINE_SECONDS
 
-    candidates.sort(reverse=True, key=lambda x: x[0])
-    selected = candidates[:PATTERN_MAX_PER_RUN]
+    def stream(url: str) -> Optional[Tuple[int, Dict[str, str]]]:
+        return _stream_feed(url, deadline, selection, cache)
+
+    changed: Dict[str, Dict[str, str]] = {}
+    for url, fetched, elapsed, err in _fetch_feeds(feeds, deadline, stream):
+        if err is not None:
+            outcome = "timeout" if isinstance(err, TimeoutError) else "error"
+            _M_FEED_FETCH.observe(elapsed, feed=url, outcome=outcome)
+            print(f"Feed error: {url} -> {err} ({elapsed:.2f}s)")
+            continue
+        if fetched is None:
+            _M_FEED_FETCH.observe(elapsed, feed=url, outcome="unchanged")
+            print(f"Feed {url}: unchanged in {elapsed:.2f}s")
+            continue
+        _M_FEED_FETCH.observe(elapsed, feed=url, outcome="ok")
+        extracted, changed[url] = fetched
+        extracted_total += extracted
+        print(f"Feed {url}: extracted {extracted} candidate patterns in {elapsed:.2f}s")
+
+    selected = selection.close()
+    _M_EXTRACTED.set(extracted_total)
+    _M_SELECTED.set(len(selected))
 
     print(f"Selected {len(selected)} new patterns (min confidence={PATTERN_MIN_CONFIDENCE})")
     for conf, sig, desc in selected:
         print(f"- [{conf}] {sig} :: {desc}")
 
-    if not selected:
-        return
-
-    if PATTERN_DRY_RUN:
+    submitted: set = set()
+    if selected and PATTERN_DRY_RUN:
         print("Dry run mode is enabled (PATTERN_DRY_RUN=1). No on-chain writes performed.")
-        return
-
-    for conf, sig, desc in selected:
+    elif selected:
+        submitted = _submit_patterns(selected)
+
+    # A feed is only cached once all of its candidates are on-chain; otherwise
+    # leftovers (cut by PATTERN_MAX_PER_RUN, dry run, failed writes) would be
+    # skipped forever.
+    for url, validators in changed.items():
+        if url not in selection.cut and all(sig in submitted for sig in selection.kept_from(url)):
+            cache.remember(url, **validators)
+    cache.save()
+    print(f"Feed cache: {cache.hits} hits, {cache.misses} misses")
+
+
+def _submit_patterns(selected: List[Tuple[int, str, str]]) -> set:
+    """Write patterns with add_attack_patterns, PATTERN_SUBMIT_BATCH_SIZE per transaction.
+
+    A batch the contract answers with an error (e.g. a deployment without the
+    batch method) was not applied, so it is retried one add_attack_pattern
+    write per pattern. A batch whose outcome is unknown (timeout, dropped
+    connection, unreadable reply) may still land, so the on-chain patterns are
+    re-read and only the missing ones are sent again, once; if that fails too
+    they are left for the next run. Returns the signatures that were written.
+    """
+    submitted = set()
+    size = max(1, PATTERN_SUBMIT_BATCH_SIZE)
+    for i in range(0, len(selected), size):
+        batch = selected[i:i + size]
         try:
-            res = _call_write("add_attack_pattern", [sig, desc])
-            print(f"Submitted pattern [{conf}] {sig} -> {res}")
+            res = _call_write("add_attack_patterns", [[[sig, desc] for _, sig, desc in batch]])
         except Exception as exc:
-            print(f"Submit failed for signature '{sig}': {exc}")
+            print(f"Batch submit outcome unknown ({exc}); re-reading on-chain patterns before retrying")
+            batch = _unwritten(batch, submitted)
+            if not batch:
+                continue
+            try:
+                res = _call_write("add_attack_patterns", [[[sig, desc] for _, sig, desc in batch]])
+            except Exception as exc:
+                print(f"Batch retry failed ({exc}); leaving {len(batch)} patterns for the next run")
+                continue
+        if "error" not in res:
+            _M_SUBMITTED.inc(len(batch))
+            submitted.update(sig for _, sig, _ in batch)
+            print(f"Submitted {len(batch)} patterns in one transaction -> {res}")
+            continue
+        print(f"Batch submit rejected ({res['error']}); submitting {len(batch)} patterns one by one")
+        for conf, sig, desc in batch:
+            try:
+                res = _call_write("add_attack_pattern", [sig, desc])
+                if "error" in res:
+                    print(f"Submit failed for signature '{sig}': {res['error']}")
+                    continue
+                _M_SUBMITTED.inc()
+                submitted.add(sig)
+                print(f"Submitted pattern [{conf}] {sig} -> {res}")
+            except Exception as exc:
+                # Not retried: the write may still land, and the next run re-reads the chain.
+                print(f"Submit failed for signature '{sig}': {exc}")
+    return submitted
+
+
+def _unwritten(batch: List[Tuple[int, str, str]], submitted: set) -> List[Tuple[int, str, str]]:
+    """Drop the patterns of ``batch`` that reached the chain, adding them to ``submitted``.
+
+    Returns an empty list if the chain cannot be read, so nothing is resent blind.
+    """
+    try:
+        onchain = _get_onchain_signatures(strict=True)
+    except Exception as exc:
+        print(f"Could not re-read on-chain patterns ({exc}); leaving {len(batch)} patterns for the next run")
+        return []
+    landed = [sig for _, sig, _ in batch if sig in onchain]
+    if landed:
+        _M_SUBMITTED.inc(len(landed))
+        submitted.update(landed)
+        print(f"{len(landed)} of {len(batch)} patterns already on-chain")
+    return [entry for entry in batch if entry[1] not in onchain]
 
 
 def main() -> None:
@@ -278,16 +563,26 @@ def main() -> None:
     except re.error as exc:
         raise RuntimeError(f"Invalid PATTERN_SIGNATURE_REGEX: {exc}") from exc
 
+    if PATTERN_METRICS_PORT:
+        start_metrics_server(_METRICS, PATTERN_METRICS_PORT)
+        print(f"Metrics on http://127.0.0.1:{PATTERN_METRICS_PORT}/metrics")
+
     if args.interval <= 0:
         _run_once(compiled_re)
         return
 
     print(f"Scheduler mode enabled. Interval={args.interval}s")
+    _M_INTERVAL.set(args.interval)
     while True:
+        started = time.monotonic()
         try:
             _run_once(compiled_re)
         except Exception as exc:
             print(f"Run failed: {exc}")
+        duration = time.monotonic() - started
+        _M_RUN.observe(duration)
+        if duration > args.interval:
+            _M_OVERRUNS.inc()
         time.sleep(args.interval)
 
 
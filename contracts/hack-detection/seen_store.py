@@ -0,0 +1,144 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SeenStore:
+    """Seen item IDs with time-based eviction.
+
+    Membership checks are O(1). Entries are kept in insertion order, so expiring
+    the oldest ones only touches what is evicted.
+
+    Persistence is a compacted snapshot (``<path>.snapshot``) plus an append-only
+    journal (``path``) of ``[id, timestamp]`` lines added since that snapshot.
+    ``flush()`` appends and fsyncs only the entries added since the previous flush.
+    Every ``snapshot_every`` flushes, or once the journal outgrows the live set,
+    the live entries are written to a temp file, fsynced and renamed over the
+    snapshot, and the journal is truncated. Recovery loads the snapshot and
+    replays the journal, dropping a torn final line left by a crash mid-append.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, snapshot_every: int = 100):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot"
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_every = snapshot_every
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+        self._pending: List[Tuple[str, float]] = []
+        self._journal_lines = 0
+        self._flushes = 0
+        self._load()
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item_id: str, ts: Optional[float] = None) -> None:
+        if item_id in self._items:
+            return
+        ts = time.time() if ts is None else ts
+        self._items[item_id] = ts
+        self._pending.append((item_id, ts))
+
+    def import_entries(self, entries: Dict[str, float]) -> None:
+        """Bulk-add entries with their original timestamps (oldest first)."""
+        for item_id, ts in sorted(entries.items(), key=lambda kv: kv[1]):
+            self.add(item_id, ts)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        evicted = 0
+        while self._items:
+            item_id, ts = next(iter(self._items.items()))
+            if ts >= cutoff:
+                break
+            self._items.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def flush(self, now: Optional[float] = None) -> None:
+        self.evict_expired(now)
+        self._flushes += 1
+        if self._pending:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for item_id, ts in self._pending:
+                    f.write(json.dumps([item_id, ts]) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_lines += len(self._pending)
+            self._pending.clear()
+        if self._flushes >= self.snapshot_every or self._journal_lines > len(self._items) + 1000:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": list(self._items.items())}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(self.snapshot_path)
+        # Crashing before this truncate only means replaying entries the
+        # snapshot already holds, which is harmless.
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines = 0
+        self._flushes = 0
+
+    def _load(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        entries: Dict[str, float] = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    for item_id, ts in json.load(f).get("entries", []):
+                        entries[item_id] = float(ts)
+            except Exception as exc:
+                print(f"Warning: seen snapshot {self.snapshot_path} unreadable ({exc}); replaying journal only.")
+        for item_id, ts in self._replay_journal():
+            entries.setdefault(item_id, ts)
+        for item_id, ts in sorted(entries.items(), key=lambda kv: kv[1]):
+            if ts >= cutoff:
+                self._items[item_id] = ts
+
+    def _replay_journal(self) -> List[Tuple[str, float]]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # Torn append from a crash: cut it off so later appends start on a clean line.
+            print(f"Warning: dropping {len(data) - end} trailing bytes from journal {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        rows: List[Tuple[str, float]] = []
+        bad = 0
+        for line in data[:end].splitlines():
+            try:
+                item_id, ts = json.loads(line)
+                rows.append((item_id, float(ts)))
+            except Exception:
+                bad += 1
+        if bad:
+            print(f"Warning: skipped {bad} unreadable lines in journal {self.path}")
+        self._journal_lines = len(rows)
+        return rows
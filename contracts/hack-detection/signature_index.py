@@ -0,0 +1,162 @@
+import math
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# Addresses, tx hashes and other long hex literals make a signature more
+# specific without making it a different attack.
+_HEX_RE = re.compile(r"0x[0-9a-f]{8,}")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def signature_tokens(signature: str) -> List[str]:
+    """Lowercased word tokens of ``signature`` in order, without punctuation or hex literals."""
+    return _TOKEN_RE.findall(_HEX_RE.sub(" ", (signature or "").lower()))
+
+
+def canonical_signature(signature: str) -> str:
+    """Order-, case-, punctuation- and address-insensitive form of ``signature``."""
+    return " ".join(sorted(set(signature_tokens(signature))))
+
+
+def _features(signature: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    tokens = signature_tokens(signature)
+    squashed = "".join(tokens)
+    grams = frozenset(squashed[i:i + 3] for i in range(len(squashed) - 2)) or frozenset([squashed])
+    return frozenset(tokens), grams
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def _prefix_len(size: int, threshold: float) -> int:
+    return size - math.ceil(threshold * size - 1e-9) + 1
+
+
+class _PrefixIndex:
+    """Jaccard similarity search over sets using prefix and positional filtering.
+
+    Each set is sorted by a fixed global order with rare elements first. Two
+    sets with Jaccard >= ``threshold`` must share an element within their
+    first ``|s| - ceil(threshold * |s|) + 1`` elements, so only those are
+    indexed and probed. The positions of the first shared element also bound
+    the possible overlap, which discards most candidates before any set is
+    intersected (PPJoin). Cost per query stays small with tens of thousands
+    of sets.
+    """
+
+    def __init__(self, threshold: float, frequency: Dict[str, int]):
+        self.threshold = threshold
+        # Frozen when the index is built; later elements count as rarest.
+        self._frequency = frequency
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._sets: Dict[int, FrozenSet[str]] = {}
+
+    def _ordered(self, items: FrozenSet[str]) -> List[str]:
+        freq = self._frequency
+        return sorted(items, key=lambda x: (freq.get(x, 0), x))
+
+    def add(self, items: FrozenSet[str], key: int) -> None:
+        self._sets[key] = items
+        ordered = self._ordered(items)
+        for pos, x in enumerate(ordered[:_prefix_len(len(ordered), self.threshold)]):
+            self._postings.setdefault(x, []).append((key, pos))
+
+    def best(self, items: FrozenSet[str]) -> Tuple[int, float]:
+        """Return (key, similarity) of the most similar indexed set at or above the threshold, or (-1, 0.0)."""
+        if not items or self.threshold <= 0:
+            return -1, 0.0
+        t = self.threshold
+        size = len(items)
+        ordered = self._ordered(items)
+        lo, hi = t * size, size / t
+        seen = set()
+        best_key, best_sim = -1, 0.0
+        for i, x in enumerate(ordered[:_prefix_len(size, t)]):
+            for key, j in self._postings.get(x, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                other = self._sets[key]
+                other_size = len(other)
+                if not lo <= other_size <= hi:
+                    continue
+                # Nothing before positions i / j is shared, so the overlap is at most this.
+                needed = math.ceil(t / (1 + t) * (size + other_size) - 1e-9)
+                if 1 + min(size - i - 1, other_size - j - 1) < needed:
+                    continue
+                sim = jaccard(items, other)
+                if sim >= t and sim > best_sim:
+                    best_key, best_sim = key, sim
+        return best_key, best_sim
+
+
+class SignatureIndex:
+    """Finds near-duplicates of attack signatures among a large known set.
+
+    Two signatures are near-duplicates when their canonical forms are equal,
+    their word-token sets reach ``threshold`` Jaccard similarity (argument
+    order, punctuation, trailing addresses), or their character trigram sets
+    do (spelling and spacing such as "re-entrancy" vs "reentrancy").
+    """
+
+    def __init__(self, signatures: Iterable[str] = (), threshold: float = 0.8):
+        signatures = list(signatures)
+        features = [_features(s) for s in signatures]
+        frequency: Dict[str, int] = {}
+        for tokens, grams in features:
+            for x in tokens:
+                frequency[x] = frequency.get(x, 0) + 1
+            for x in grams:
+                frequency[x] = frequency.get(x, 0) + 1
+        self.threshold = threshold
+        self._signatures: List[str] = []
+        self._canonical: Dict[str, int] = {}
+        self._tokens = _PrefixIndex(threshold, frequency)
+        self._grams = _PrefixIndex(threshold, frequency)
+        for signature, feats in zip(signatures, features):
+            self._add(signature, feats)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, signature: str) -> None:
+        self._add(signature, _features(signature))
+
+    def _add(self, signature: str, feats: Tuple[FrozenSet[str], FrozenSet[str]]) -> None:
+        key = len(self._signatures)
+        self._signatures.append(signature)
+        canonical = canonical_signature(signature)
+        if canonical:
+            self._canonical.setdefault(canonical, key)
+        self._tokens.add(feats[0], key)
+        self._grams.add(feats[1], key)
+
+    def find(self, signature: str) -> Optional[Tuple[str, float]]:
+        """Return (known signature, similarity) for the closest near-duplicate of ``signature``, or None."""
+        canonical = canonical_signature(signature)
+        if not canonical:
+            return None
+        key = self._canonical.get(canonical)
+        if key is not None:
+            return self._signatures[key], 1.0
+        tokens, grams = _features(signature)
+        best = max(self._tokens.best(tokens), self._grams.best(grams), key=lambda hit: hit[1])
+        if best[0] < 0:
+            return None
+        return self._signatures[best[0]], best[1]
+
+
+def similar(a: str, b: str, threshold: float = 0.8) -> bool:
+    """Pairwise form of ``SignatureIndex.find`` for small sets."""
+    canonical = canonical_signature(a)
+    if not canonical:
+        return False
+    if canonical == canonical_signature(b):
+        return True
+    (ta, ga), (tb, gb) = _features(a), _features(b)
+    return jaccard(ta, tb) >= threshold or jaccard(ga, gb) >= threshold
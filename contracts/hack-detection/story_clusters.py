@@ -0,0 +1,122 @@
+import hashlib
+import random
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet, List, Optional, Set, Tuple
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9$]+")
+# Aggregators such as Google News append " - Outlet" to every title.
+_SOURCE_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+_STOPWORDS = frozenset(
+    "a an and as at by for from has have in is it its of on or over the to was were with after".split()
+)
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    text = _SOURCE_SUFFIX_RE.sub("", title or "").lower()
+    return frozenset(t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class StoryClusterer:
+    """Streaming near-duplicate detector for headlines.
+
+    Titles are reduced to token sets and MinHash signatures. Locality-sensitive
+    banding finds candidate clusters in roughly constant time per title, and a
+    candidate is accepted when the estimated Jaccard similarity reaches
+    ``threshold``. Clusters expire ``window_seconds`` after they were last
+    matched.
+    """
+
+    def __init__(self, window_seconds: float = 6 * 3600, threshold: float = 0.5, num_perm: int = 32, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Fixed seed so signatures are comparable across restarts.
+        rng = random.Random(0x5EED)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+        self._clusters: Dict[int, Dict] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = {}
+        self._expiry: Deque[Tuple[float, int]] = deque()
+        self._next_id = 0
+
+    def _signature(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [_token_hash(t) for t in tokens]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, sig: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(b, sig[b * self.rows:(b + 1) * self.rows]) for b in range(self.bands)]
+
+    def _evict(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            _, cid = self._expiry.popleft()
+            cluster = self._clusters.get(cid)
+            if cluster is None:
+                continue
+            if cluster["expires"] > now:
+                # Refreshed after this entry was queued; it has a later entry.
+                continue
+            for key in self._band_keys(cluster["sig"]):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(cid)
+                    if not bucket:
+                        del self._buckets[key]
+            del self._clusters[cid]
+
+    def assign(self, title: str, now: Optional[float] = None) -> Tuple[int, bool]:
+        """Return ``(cluster_id, is_new)`` for ``title``."""
+        now = time.time() if now is None else now
+        self._evict(now)
+        tokens = title_tokens(title)
+        sig = self._signature(tokens) if tokens else ()
+        best_id, best_sim = -1, 0.0
+        if sig:
+            candidates: Set[int] = set()
+            for key in self._band_keys(sig):
+                candidates |= self._buckets.get(key, set())
+            for cid in candidates:
+                other = self._clusters[cid]["sig"]
+                sim = sum(1 for x, y in zip(sig, other) if x == y) / len(sig)
+                if sim > best_sim:
+                    best_id, best_sim = cid, sim
+        expires = now + self.window_seconds
+        if best_id >= 0 and best_sim >= self.threshold:
+            self._clusters[best_id]["expires"] = expires
+            self._expiry.append((expires, best_id))
+            return best_id, False
+
+        cid = self._next_id
+        self._next_id += 1
+        self._clusters[cid] = {"sig": sig, "expires": expires}
+        self._expiry.append((expires, cid))
+        if sig:
+            for key in self._band_keys(sig):
+                self._buckets.setdefault(key, set()).add(cid)
+        return cid, True
+
+    def forget(self, cluster_id: int) -> None:
+        """Drop a cluster, e.g. one whose story was never submitted, so later reports start a new one."""
+        cluster = self._clusters.pop(cluster_id, None)
+        if cluster is None:
+            return
+        for key in self._band_keys(cluster["sig"]) if cluster["sig"] else []:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(cluster_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._clusters)
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# (tx_data, tx_hash, origin); origin is the transaction's originator, or "".
+Alert = Tuple[str, str, str]
+# Sends alerts; returns one error message (or None on success) per alert.
+SendBatch = Callable[[List[Alert]], List[Optional[str]]]
+
+# Contract rejections that no retry can fix (HackDetection's UserError messages).
+PERMANENT_ERRORS = ("Contract is paused", "or admin allowed", "Each item must be", "transactions per batch")
+
+
+class SubmissionQueue:
+    """Bounded background queue that delivers alerts off the caller's thread.
+
+    ``put`` never blocks. Worker threads take ready alerts in batches of up to
+    ``batch_size``, respect a client-side ``rate_per_second``, and retry failed
+    alerts with jittered exponential backoff. An alert is appended to the
+    dead-letter file (JSON lines) when it fails ``max_attempts`` times, when
+    its error contains one of ``permanent_errors``, when the queue is full, or
+    when it is still queued, throttled or in flight at ``close()``.
+    ``replay_dead_letters`` re-enqueues that file on the next start.
+    """
+
+    def __init__(
+        self,
+        send_batch: SendBatch,
+        dead_letter_path: str,
+        workers: int = 2,
+        max_pending: int = 1000,
+        batch_size: int = 20,
+        max_attempts: int = 6,
+        backoff_seconds: float = 2.0,
+        backoff_max_seconds: float = 300.0,
+        rate_per_second: float = 5.0,
+        on_event: Optional[Callable[[str], None]] = None,
+        permanent_errors: Tuple[str, ...] = PERMANENT_ERRORS,
+    ):
+        self.send_batch = send_batch
+        self.dead_letter_path = dead_letter_path
+        self.replay_path = f"{dead_letter_path}.replay"
+        self.max_pending = max_pending
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.rate_per_second = rate_per_second
+        self.on_event = on_event or (lambda kind: None)
+        self.permanent_errors = permanent_errors
+
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # Entries taken by a worker and not yet resolved, by id(); whoever pops
+        # an entry (the worker, or close() on timeout) owns its outcome.
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._closed = False
+        self._stop = threading.Event()
+        self._dlq_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_send = 0.0
+        self._replay_left = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"submit-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def put(self, tx_data: str, tx_hash: str, origin: str = "") -> bool:
+        """Enqueue an alert; returns False if the queue was full and it went to the dead-letter file."""
+        entry = {"tx_data": tx_data, "tx_hash": tx_hash, "origin": origin, "attempts": 0}
+        if self._push(entry, time.monotonic()):
+            return True
+        self._dead_letter(entry, "submission queue full")
+        return False
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap) + len(self._active)
+
+    def replay_dead_letters(self) -> int:
+        """Re-enqueue alerts from the dead-letter file (and any replay interrupted by a crash)."""
+        entries: List[Dict[str, Any]] = []
+        with self._dlq_lock:
+            if os.path.exists(self.dead_letter_path):
+                with open(self.dead_letter_path, "r", encoding="utf-8") as src, open(self.replay_path, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.dead_letter_path)
+            if not os.path.exists(self.replay_path):
+                return 0
+            with open(self.replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        entries.append({
+                            "tx_data": row["tx_data"],
+                            "tx_hash": row["tx_hash"],
+                            "origin": row.get("origin", ""),
+                            "attempts": 0,
+                            "replay": True,
+                        })
+                    except Exception:
+                        continue
+            if not entries:
+                os.remove(self.replay_path)
+                return 0
+            self._replay_left = len(entries)
+        now = time.monotonic()
+        for entry in entries:
+            if not self._push(entry, now, force=True):
+                self._dead_letter(entry, "submission queue closed")
+        return len(entries)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the workers and move anything unresolved to the dead-letter file.
+
+        Throttled batches are not sent. A batch still in flight when ``timeout``
+        expires is dead-lettered too, so it may be delivered twice after a replay.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        with self._cond:
+            pending = [entry for _, _, entry in self._heap] + list(self._active.values())
+            self._heap.clear()
+            self._active.clear()
+        for entry in pending:
+            self._dead_letter(entry, "pending at shutdown")
+
+    def _push(self, entry: Dict[str, Any], ready_at: float, force: bool = False) -> bool:
+        with self._cond:
+            if self._closed:
+                return False
+            if not force and len(self._heap) + len(self._active) >= self.max_pending:
+                return False
+            heapq.heappush(self._heap, (ready_at, next(self._seq), entry))
+            self._cond.notify()
+            return True
+
+    def _take_batch(self) -> Optional[List[Dict[str, Any]]]:
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    break
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            batch = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                entry = heapq.heappop(self._heap)[2]
+                self._active[id(entry)] = entry
+                batch.append(entry)
+            return batch
+
+    def _throttle(self, n: int) -> None:
+        if self.rate_per_second <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            self._next_send = max(self._next_send, now)
+            wait = self._next_send - now
+            self._next_send += n / self.rate_per_second
+        if wait > 0:
+            self._stop.wait(wait)
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._throttle(len(batch))
+            if self._stop.is_set():
+                # Left in _active for close() to dead-letter.
+                return
+            try:
+                errors = self.send_batch([(e["tx_data"], e["tx_hash"], e.get("origin", "")) for e in batch])
+            except Exception as exc:
+                errors = [str(exc)] * len(batch)
+            with self._cond:
+                owned = [(e, err) for e, err in zip(batch, errors) if self._active.pop(id(e), None) is not None]
+                self._cond.notify_all()
+            for entry, err in owned:
+                if err is None:
+                    self.on_event("sent")
+                    self._resolved(entry)
+                elif any(marker in err for marker in self.permanent_errors):
+                    entry["attempts"] += 1
+                    self._dead_letter(entry, err)
+                else:
+                    self._retry(entry, err)
+
+    def _retry(self, entry: Dict[str, Any], error: str) -> None:
+        entry["attempts"] += 1
+        if entry["attempts"] >= self.max_attempts:
+            self._dead_letter(entry, error)
+            return
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (entry["attempts"] - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self.on_event("retry")
+        if not self._push(entry, time.monotonic() + delay, force=True):
+            self._dead_letter(entry, error)
+
+    def _dead_letter(self, entry: Dict[str, Any], error: str) -> None:
+        row = {
+            "tx_data": entry["tx_data"],
+            "tx_hash": entry["tx_hash"],
+            "origin": entry.get("origin", ""),
+            "attempts": entry["attempts"],
+            "error": error,
+            "ts": time.time(),
+        }
+        with self._dlq_lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        print(f"Dead-lettered {entry['tx_hash']} after {entry['attempts']} attempts: {error}")
+        self.on_event("dead_letter")
+        self._resolved(entry)
+
+    def _resolved(self, entry: Dict[str, Any]) -> None:
+        if not entry.get("replay"):
+            return
+        with self._dlq_lock:
+            self._replay_left -= 1
+            if self._replay_left == 0 and os.path.exists(self.replay_path):
+                os.remove(self.replay_path)
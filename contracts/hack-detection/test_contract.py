@@ -1,7 +1,8 @@
 import json
 import os
 import time
-import urllib.request
+
+from http_pool import HTTPPool
 
 
 RPC_URL = os.getenv("GENLAYER_RPC_URL", "https://studio.genlayer.com/api")
@@ -16,6 +17,11 @@ CALL_VIEW = os.getenv("GENLAYER_VIEW_METHOD", "gen_call")
 POLL_SECONDS = 5
 POLL_ATTEMPTS = 10
 
+_HTTP = HTTPPool(
+    max_per_host=int(os.getenv("HTTP_POOL_MAX_PER_HOST", "4")),
+    timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", "30")),
+)
+
 
 def _rpc_call(method: str, params):
     payload = {
@@ -30,10 +36,7 @@ def _rpc_call(method: str, params):
         # Try common header names
         headers["Authorization"] = f"Bearer {API_KEY}"
         headers["x-api-key"] = API_KEY
-    req = urllib.request.Request(
-        RPC_URL, data=data, headers=headers
-    )
-    with urllib.request.urlopen(req, timeout=30) as resp:
+    with _HTTP.request("POST", RPC_URL, body=data, headers=headers) as resp:
         raw = resp.read().decode("utf-8")
     return json.loads(raw)
 
@@ -0,0 +1,304 @@
+import importlib.util
+import json
+import random
+import sys
+import types
+import typing
+
+import pytest
+
+
+ADMIN = "0x" + "ad" * 20
+BOT = "0x" + "b0" * 20
+
+
+def _fake_genlayer():
+    """Minimal in-memory stand-in for the GenLayer SDK surface the contract uses."""
+    gl = types.ModuleType("genlayer.gl")
+    vm = types.ModuleType("genlayer.gl.vm")
+
+    class UserError(Exception):
+        pass
+
+    class Address(str):
+        def __new__(cls, value):
+            if isinstance(value, bytes):
+                value = "0x" + value.hex()
+            return str.__new__(cls, value)
+
+    class TreeMap(dict):
+        pass
+
+    class DynArray(list):
+        pass
+
+    class Event:
+        def __init__(self, **blob):
+            gl.emitted.append((type(self).__name__, blob))
+
+    class Contract:
+        def __new__(cls, *args, **kwargs):
+            self = object.__new__(cls)
+            # Storage fields start empty, as on-chain.
+            for name, hint in cls.__annotations__.items():
+                origin = typing.get_origin(hint) or hint
+                if origin is TreeMap:
+                    setattr(self, name, TreeMap())
+                elif origin is DynArray:
+                    setattr(self, name, DynArray())
+            return self
+
+    def exec_prompt(prompt):
+        gl.prompts.append(prompt)
+        reply = gl.replies.pop(0) if gl.replies else "NONE"
+        return reply(prompt) if callable(reply) else reply
+
+    def strict_eq(fn):
+        gl.rounds += 1
+        return fn()
+
+    vm.UserError = UserError
+    gl.vm = vm
+    gl.Event = Event
+    gl.Contract = Contract
+    gl.public = types.SimpleNamespace(write=lambda f: f, view=lambda f: f)
+    gl.message = types.SimpleNamespace(sender_address=Address(BOT))
+    gl.nondet = types.SimpleNamespace(exec_prompt=exec_prompt)
+    gl.eq_principle = types.SimpleNamespace(strict_eq=strict_eq)
+    gl.emitted, gl.prompts, gl.replies, gl.rounds = [], [], [], 0
+
+    genlayer = types.ModuleType("genlayer")
+    genlayer.gl = gl
+    genlayer.Address = Address
+    genlayer.TreeMap = TreeMap
+    genlayer.DynArray = DynArray
+    genlayer.u256 = int
+    genlayer.u8 = int
+    genlayer.allow_storage = lambda cls: cls
+    genlayer.__all__ = ["gl", "Address", "TreeMap", "DynArray", "u256", "u8", "allow_storage"]
+    return genlayer, gl, vm
+
+
+@pytest.fixture
+def env(monkeypatch):
+    genlayer, gl, vm = _fake_genlayer()
+    monkeypatch.setitem(sys.modules, "genlayer", genlayer)
+    monkeypatch.setitem(sys.modules, "genlayer.gl", gl)
+    monkeypatch.setitem(sys.modules, "genlayer.gl.vm", vm)
+    spec = importlib.util.spec_from_file_location("hack_detection_contract_under_test", "hack_detection_contract.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def deploy():
+        gl.message.sender_address = genlayer.Address(ADMIN)
+        contract = module.HackDetection(genlayer.Address(ADMIN))
+        gl.message.sender_address = genlayer.Address(BOT)
+        return contract
+
+    def as_admin(call, *args):
+        gl.message.sender_address = genlayer.Address(ADMIN)
+        try:
+            return call(*args)
+        finally:
+            gl.message.sender_address = genlayer.Address(BOT)
+
+    return types.SimpleNamespace(gl=gl, module=module, deploy=deploy, as_admin=as_admin, UserError=vm.UserError)
+
+
+def _linear_matches(contract, tx_data):
+    return [int(p.pattern_id) for p in contract.attack_patterns if p.signature in tx_data]
+
+
+def test_anchor_index_matches_linear_scan(env):
+    contract = env.deploy()
+    rng = random.Random(3)
+    alphabet = "abcdef0123_"
+    signatures = ["".join(rng.choice(alphabet) for _ in range(rng.randint(2, 9))) for _ in range(400)]
+    env.as_admin(contract.add_attack_patterns, [[sig, f"p{i}"] for i, sig in enumerate(signatures)])
+
+    for _ in range(200):
+        tx_data = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        # More patterns than characters, so the anchor index is the path under test.
+        assert len(contract.attack_patterns) > len(tx_data)
+        assert contract._match_patterns(tx_data) == _linear_matches(contract, tx_data)
+
+
+def test_anchor_index_covers_patterns_added_after_deployment(env):
+    contract = env.deploy()
+    env.as_admin(contract.add_attack_patterns, [[f"flash loan {i:03d}", "batch"] for i in range(100)])
+    contract.analyze_transaction("routine transfer", "0x1")
+
+    env.as_admin(contract.add_attack_pattern, "drain()", "late")
+    env.as_admin(contract.add_attack_pattern, "xyz", "short")
+    tx_data = "flash loan 042 then drain() via xyz"
+    assert contract._match_patterns(tx_data) == _linear_matches(contract, tx_data) == [42, 100, 101]
+
+
+def test_verdict_cache_reuses_repeated_payload(env):
+    contract = env.deploy()
+    env.gl.replies[:] = ["MEDIUM"]
+    payload = "exploit with reentrancy"
+
+    contract.analyze_transaction(payload, "0x1")
+    assert env.gl.rounds == 1
+    contract.analyze_transaction(payload, "0x2")
+    # Same payload: the stored verdict is used, with no second consensus round.
+    assert env.gl.rounds == 1
+    assert len(contract.verdict_cache) == 1
+    first, second = (json.loads(contract.tx_analysis[h]) for h in ("0x1", "0x2"))
+    assert first["reason"] == second["reason"] == "ai_grade"
+    assert [e.tx_hash for e in contract.security_events if e.event_type == "predicted_threat"] == ["0x1", "0x2"]
+
+
+def test_verdict_cache_invalidated_when_patterns_change(env):
+    contract = env.deploy()
+    env.gl.replies[:] = ["NONE", "NONE"]
+    payload = "exploit with reentrancy"
+
+    contract.analyze_transaction(payload, "0x1")
+    assert json.loads(contract.tx_analysis["0x1"])["threat"] is False
+    env.as_admin(contract.add_attack_pattern, "reentrancy", "Reentrancy")
+    contract.analyze_transaction(payload, "0x2")
+    analysis = json.loads(contract.tx_analysis["0x2"])
+    assert analysis["threat"] is True and analysis["pattern"] == "Reentrancy"
+
+
+def test_verdict_cache_is_bounded(env):
+    contract = env.deploy()
+    contract.VERDICT_CACHE_SIZE = 2
+    for i in range(5):
+        contract.analyze_transaction(f"routine transfer {i}", f"0x{i}")
+    assert len(contract.verdict_cache) == 2
+    assert set(contract.verdict_cache) == set(contract.verdict_cache_keys.values())
+
+
+def test_grade_token_reads_whole_words_only(env):
+    contract = env.deploy()
+    env.gl.replies[:] = ["ALLOWED transfer, risk HIGH", "Below threshold: none", "Flow looks fine", " medium."]
+    assert [contract._nondet_grade_token("p") for _ in range(4)] == ["HIGH", "NONE", "NONE", "MEDIUM"]
+
+
+def test_analyze_transactions_empty_batch_is_a_no_op(env):
+    contract = env.deploy()
+    contract.analyze_transactions([])
+    assert env.gl.rounds == 0
+    assert contract.tx_analysis == {} and contract.security_events == []
+    assert int(contract.recent_index) == 0
+
+
+def test_analyze_transactions_tolerates_malformed_ai_reply(env):
+    contract = env.deploy()
+    env.as_admin(contract.add_attack_pattern, "swap_loop", "loop")
+    env.gl.replies[:] = ["1. HIGH\n2: ???"]
+    contract.analyze_transactions([
+        ["0xa", "exploit with reentrancy"],
+        ["0xb", "hack attack with flash"],
+        ["0xc", "routine transfer"],
+        ["0xd", "exploit with reentrancy"],
+        ["0xe", "swap_loop x"],
+        ["0xf", "swap_loop y"],
+    ])
+    # Only the two distinct uncertain payloads reach validators, in one round.
+    assert env.gl.rounds == 1
+    reasons = {h: json.loads(contract.tx_analysis[h]).get("reason") for h in ("0xa", "0xb", "0xc", "0xd")}
+    assert reasons == {"0xa": "AI consensus", "0xb": None, "0xc": None, "0xd": "AI consensus"}
+    # A missing grade counts as NONE. The in-band HIGH grade does not pause;
+    # the two pattern hits do, and the breaker fires once for the batch.
+    assert [e.event_type for e in contract.security_events].count("circuit_breaker") == 1
+    assert contract.is_paused
+
+
+def test_analyze_transactions_grades_in_chunks_with_relevant_patterns(env):
+    contract = env.deploy()
+    env.as_admin(contract.set_thresholds, 31, 100)
+    env.as_admin(contract.add_attack_patterns, [["unrelated_sig", "x"], ["swap_loop", "y"]])
+    items = [[f"0x{i}", f"exploit drained {i}"] for i in range(24)] + [["0xs", "swap_loop twice"]]
+    contract.analyze_transactions(items)
+    assert env.gl.rounds == 3
+    assert all("unrelated_sig" not in p for p in env.gl.prompts)
+    assert "swap_loop twice (known patterns found in it: ['swap_loop'])" in env.gl.prompts[-1]
+
+
+def test_analyze_transactions_rejects_malformed_items(env):
+    contract = env.deploy()
+    with pytest.raises(env.UserError):
+        contract.analyze_transactions([["0x1", "data", "0xorigin", "extra"]])
+
+
+def test_risk_terms_match_whole_words(env):
+    contract = env.deploy()
+    assert contract._score_payload("hackathon sponsored by flashbots")["score"] == 0
+    # Inflections and snake_case chain reasons still count, each term once.
+    assert contract._score_payload("hackers exploited it, then exploited it again")["score"] == 35
+    assert contract._score_payload("reasons=['aave_flash_loan', 'protocol_outflow_burst']")["score"] == 35
+
+
+def test_benign_traffic_is_decided_without_validators(env):
+    contract = env.deploy()
+    for i, payload in enumerate(["routine transfer", "hack weekend recap", "swap on router", "oracle update"]):
+        contract.analyze_transaction(payload, f"0x{i}")
+    assert env.gl.rounds == 0
+    assert not contract.is_paused
+    assert all(not json.loads(v)["threat"] for v in contract.tx_analysis.values())
+
+
+def test_thresholds_decide_between_ai_and_auto_pause(env):
+    contract = env.deploy()
+    payload = "exploit with reentrancy"  # 45 points, capped at RISK_TERMS_MAX (40)
+    env.as_admin(contract.set_thresholds, 20, 50)
+    assert json.loads(contract.get_thresholds()) == {"notify_level_min": 20, "auto_pause_level_min": 50}
+    env.gl.replies[:] = ["MEDIUM"]
+    contract.analyze_transaction(payload, "0x1")
+    # In the band: one AI round, a notified threat, and no pause below auto_pause_level_min.
+    assert env.gl.rounds == 1 and not contract.is_paused
+    assert json.loads(contract.tx_analysis["0x1"])["reason"] == "ai_grade"
+
+    env.as_admin(contract.set_thresholds, 20, 40)
+    contract.analyze_transaction(payload, "0x2")
+    assert env.gl.rounds == 1 and contract.is_paused
+    assert json.loads(contract.tx_analysis["0x2"])["reason"] == "Risk score"
+
+    with pytest.raises(env.UserError):
+        env.as_admin(contract.set_thresholds, 60, 40)
+
+
+def test_ai_escalation_alerts_but_pauses_only_at_the_threshold(env):
+    contract = env.deploy()
+    env.gl.replies[:] = ["HIGH"]
+    contract.analyze_transaction("exploit with reentrancy", "0x1")
+    analysis = json.loads(contract.tx_analysis["0x1"])
+    # A HIGH grade in the band alerts, but the stored score stays below
+    # auto_pause_level_min, so the contract does not pause on it.
+    assert contract.get_risk_score("0x1") == analysis["risk_score"] == 40
+    assert analysis["threat"] and analysis["reason"] == "AI consensus"
+    assert analysis["risk_level"] == "MEDIUM"
+    assert not contract.is_paused
+
+    contract.analyze_transaction("swap exploit", "0x2")
+    env.as_admin(contract.add_attack_pattern, "swap exploit", "loop")
+    contract.analyze_transaction("swap exploit", "0x3")
+    assert contract.get_risk_score("0x3") >= int(contract.auto_pause_level_min)
+    assert contract.is_paused
+
+
+def test_origin_history_is_per_originator_and_resets(env):
+    contract = env.deploy()
+    attacker, other = "0x" + "aa" * 20, "0x" + "cc" * 20
+    env.gl.message.timestamp = 1_000
+    env.gl.replies[:] = ["MEDIUM"] * 3
+    for i in range(3):
+        contract.analyze_transaction(f"exploit with reentrancy {i}", f"0x{i}", attacker)
+    assert contract._origin_history(attacker) == 30
+    # The submitting bot and other originators carry no history.
+    assert contract._origin_history(other) == 0 and contract._origin_history("") == 0
+    assert contract._score_payload("hack attack")["score"] + contract._origin_history(attacker) == 55
+
+    env.gl.message.timestamp = 1_000 + contract.ORIGIN_HISTORY_WINDOW + 1
+    assert contract._origin_history(attacker) == 0
+
+    # An expired count restarts; origins are compared case-insensitively.
+    env.gl.replies[:] = ["MEDIUM"]
+    contract.analyze_transaction("exploit with reentrancy 3", "0x9", "0x" + "AA" * 20)
+    assert contract._origin_history(attacker) == 10
+    env.as_admin(contract.unpause)
+    assert contract._origin_history(attacker) == 0
@@ -0,0 +1,37 @@
+import urllib.request
+
+from metrics import Registry, start_metrics_server
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    fetch = registry.histogram("feed_fetch_seconds", "Feed fetch latency.", ["feed"], buckets=(0.1, 1.0))
+    errors = registry.counter("rpc_errors_total", "RPC errors.", ["method"])
+    size = registry.gauge("state_file_bytes", "State size.")
+
+    fetch.observe(0.05, feed='a"b')
+    fetch.observe(0.5, feed='a"b')
+    errors.inc(method="gen_call")
+    errors.inc(2, method="gen_call")
+    size.set(1234)
+
+    text = registry.render()
+    assert "# TYPE feed_fetch_seconds histogram" in text
+    assert 'feed_fetch_seconds_bucket{feed="a\\"b",le="0.1"} 1.0' in text
+    assert 'feed_fetch_seconds_bucket{feed="a\\"b",le="1.0"} 2.0' in text
+    assert 'feed_fetch_seconds_bucket{feed="a\\"b",le="+Inf"} 2.0' in text
+    assert 'feed_fetch_seconds_count{feed="a\\"b"} 2.0' in text
+    assert 'rpc_errors_total{method="gen_call"} 3.0' in text
+    assert "state_file_bytes 1234.0" in text
+
+
+def test_metrics_server_serves_registry():
+    registry = Registry()
+    registry.counter("cycles_total", "Cycles.").inc()
+    server = start_metrics_server(registry, 0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            assert "cycles_total 1.0" in resp.read().decode()
+    finally:
+        server.shutdown()
@@ -0,0 +1,633 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import monitor
+from feed_cache import FeedCache
+
+
+RSS_BODY = b"""<?xml version="1.0"?>
+<rss><channel>
+<item><title>Bridge exploit drains funds</title><link>https://n/1</link><guid>1</guid></item>
+<item><title>Market update</title><link>https://n/2</link><guid>2</guid></item>
+</channel></rss>"""
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    body = RSS_BODY
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/feed"
+
+
+def test_fetch_all_skips_feeds_past_deadline(monkeypatch):
+    def fake_fetch(url, cache=None, seen=None, scheduler=None, deadline=None):
+        if "slow" in url:
+            time.sleep(2)
+        if "broken" in url:
+            raise ValueError("bad xml")
+        return [{"title": url, "link": url, "pub_date": "", "id": url}], None
+
+    monkeypatch.setattr(monitor, "_fetch_rss", fake_fetch)
+    monkeypatch.setattr(monitor, "FEED_DEADLINE_SECONDS", 0.5)
+
+    start = time.monotonic()
+    results = monitor._fetch_all(["https://a/fast", "https://b/slow", "https://c/broken"])
+    elapsed = time.monotonic() - start
+
+    assert list(results) == ["https://a/fast"]
+    assert elapsed < 1.5
+
+
+def test_fetch_rss_uses_conditional_get(tmp_path):
+    server, url = _serve(_FeedHandler)
+    try:
+        cache = FeedCache(str(tmp_path / "cache.json"))
+        items, validators = monitor._fetch_rss(url, cache)
+        assert [i["id"] for i in items] == ["1", "2"]
+        # Nothing is cached until the caller has handled the items.
+        assert cache.request_headers(url) == {}
+        assert monitor._fetch_rss(url, cache)[0] is not None
+
+        cache.remember(url, validators["digest"], validators["etag"], validators["last_modified"])
+        assert monitor._fetch_rss(url, cache) == (None, None)
+        assert cache.hits == 1 and cache.misses == 2
+
+        cache.save()
+        reloaded = FeedCache(str(tmp_path / "cache.json"))
+        assert reloaded.request_headers(url) == {"If-None-Match": '"v1"'}
+    finally:
+        server.shutdown()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _feed_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("feed-fetch")]
+
+
+def test_fetch_all_straggler_does_not_cache_its_validators(tmp_path, monkeypatch):
+
+    class SlowHandler(_FeedHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", self.etag)
+            self.send_header("Content-Length", str(len(self.body)))
+            self.end_headers()
+            # Trickle the body so the fetch outlives the deadline without a socket timeout.
+            for i in range(0, len(self.body), 64):
+                self.wfile.write(self.body[i:i + 64])
+                self.wfile.flush()
+                time.sleep(0.1)
+
+    server, url = _serve(SlowHandler)
+    try:
+        monkeypatch.setattr(monitor, "FEED_DEADLINE_SECONDS", 0.3)
+        cache = FeedCache(str(tmp_path / "cache.json"))
+        assert monitor._fetch_all([url], cache) == {}
+        assert _wait_for(lambda: not _feed_threads())
+        # The late response must not turn the next poll into a 304 for unscored items.
+        assert cache.entries == {} and cache.request_headers(url) == {}
+        monkeypatch.setattr(monitor, "FEED_DEADLINE_SECONDS", 5)
+        items, _ = monitor._fetch_all([url], cache)[url]
+        assert [i["id"] for i in items] == ["1", "2"]
+    finally:
+        server.shutdown()
+
+
+def test_fetch_all_hanging_feed_releases_its_thread_and_slot(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    class HangingHandler(_FeedHandler):
+        def do_GET(self):
+            # Keep the body coming a byte at a time, so no single read times out.
+            self.send_response(200)
+            self.send_header("Content-Length", "100000")
+            self.end_headers()
+            try:
+                while not release.wait(0.05):
+                    self.wfile.write(b" ")
+                    self.wfile.flush()
+            except OSError:
+                pass
+
+    server, url = _serve(HangingHandler)
+    try:
+        monkeypatch.setattr(monitor, "FEED_DEADLINE_SECONDS", 0.3)
+        monkeypatch.setattr(monitor, "_HTTP", monitor.HTTPPool(max_per_host=1, timeout=30))
+        started = time.monotonic()
+        assert monitor._fetch_all([url]) == {}
+        assert time.monotonic() - started < 1
+        # The straggler times out at the shared deadline instead of holding on.
+        assert _wait_for(lambda: not _feed_threads(), timeout=2)
+        slot = monitor._HTTP._slot(("http", "127.0.0.1", server.server_port, ""))
+        assert slot.acquire(timeout=0)
+        slot.release()
+    finally:
+        release.set()
+        server.shutdown()
+
+
+def test_feed_cache_detects_unchanged_body_without_validators(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache.json"))
+    assert cache.update("u", b"<rss/>") is True
+    assert cache.update("u", b"<rss/>") is False
+    assert cache.update("u", b"<rss>new</rss>") is True
+
+
+def test_score_text_uses_word_boundaries_and_longest_keyword():
+    score, hits = monitor._score_text("Protocol HACKED in rugpull; shrug")
+    assert hits == ["protocol", "hacked", "rugpull"]
+    assert score == 10 + 30 + 25
+
+    # "hack" inside "hackathon" and "rug" inside "shrug" are not hits; plurals are.
+    assert monitor._score_text("hackathon shrug")[1] == []
+    assert monitor._score_text("two exploits")[1] == ["exploit"]
+
+
+def test_score_text_counts_inflected_keywords_in_real_headlines():
+    # Pinned against the original substring scorer; inflections must keep scoring.
+    assert monitor._score_text("Protocol exploited for $10M; attackers used flash loan") == (
+        60, ["protocol", "exploit", "attack"]
+    )
+    assert monitor._score_text("Euler Finance exploited, hackers return funds") == (55, ["exploit", "hack"])
+    assert monitor._score_text("Hackers drain $120M from DeFi bridge in oracle attack") == (
+        85, ["hack", "bridge", "oracle", "attack"]
+    )
+    # Longer keywords still win over their inflected prefixes.
+    assert monitor._score_text("exploiters hacked the bridge")[1] == ["exploiters", "hacked", "bridge"]
+
+
+def test_keyword_matcher_handles_large_keyword_lists():
+    from keyword_matcher import KeywordMatcher
+
+    weights = {f"kw{i:05d}": 1 for i in range(5000)}
+    weights["flash loan"] = 40
+    matcher = KeywordMatcher(weights)
+    assert matcher.score("a flash loan hit kw04999 and kw00001, kw00001 again") == (
+        42,
+        ["flash loan", "kw04999", "kw00001"],
+    )
+
+
+def test_seen_store_evicts_by_ttl_and_appends_only_new_entries(tmp_path):
+    from seen_store import SeenStore
+
+    path = tmp_path / "seen.jsonl"
+    store = SeenStore(str(path), ttl_seconds=100)
+    store.add("old", ts=1000)
+    store.add("new", ts=1150)
+    store.flush(now=1090)
+    assert "old" in store and "new" in store
+    assert len(path.read_text().splitlines()) == 2
+
+    store.add("newer", ts=1200)
+    store.flush(now=1210)
+    assert "old" not in store
+    assert len(path.read_text().splitlines()) == 3
+
+    reloaded = SeenStore(str(path), ttl_seconds=10**12)
+    assert len(reloaded) == 3
+
+
+def test_seen_store_imports_legacy_state(tmp_path, monkeypatch):
+    import json
+    from datetime import datetime, timezone
+
+    legacy = tmp_path / "monitor_state.json"
+    now = datetime.now(timezone.utc).isoformat()
+    legacy.write_text(json.dumps({"seen": {"a": now, "b": "2001-01-01T00:00:00+00:00"}}))
+    monkeypatch.setattr(monitor, "STATE_FILE", str(legacy))
+    monkeypatch.setattr(monitor, "SEEN_FILE", str(tmp_path / "seen.jsonl"))
+
+    store = monitor._load_seen_store()
+    assert "a" in store and "b" not in store
+
+
+def test_seen_store_recovers_from_snapshot_and_torn_journal(tmp_path):
+    from seen_store import SeenStore
+
+    path = tmp_path / "seen.jsonl"
+    store = SeenStore(str(path), ttl_seconds=10**9, snapshot_every=2)
+    store.add("a")
+    store.flush()
+    store.add("b")
+    store.flush()  # second flush compacts into the snapshot
+    assert path.read_text() == ""
+    store.add("c")
+    store.flush()
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('["d", 12')  # crash in the middle of an append
+
+    recovered = SeenStore(str(path), ttl_seconds=10**9)
+    assert {"a", "b", "c"} <= set(recovered._items) and "d" not in recovered
+    recovered.add("e")
+    recovered.flush()
+    assert "e" in SeenStore(str(path), ttl_seconds=10**9)
+
+
+def test_fetch_rss_stops_after_run_of_seen_items(tmp_path, monkeypatch):
+    from seen_store import SeenStore
+
+    entries = "".join(
+        f"<item><title>t{i}</title><link>https://n/{i}</link><guid>{i}</guid></item>" for i in range(50)
+    )
+
+    class Handler(_FeedHandler):
+        body = f"<rss><channel>{entries}</channel></rss>".encode()
+
+    seen = SeenStore(str(tmp_path / "seen.jsonl"), ttl_seconds=10**9)
+    for i in range(2, 50):
+        seen.add(monitor._item_id({"id": str(i), "link": f"https://n/{i}"}))
+    monkeypatch.setattr(monitor, "FEED_STOP_AFTER_SEEN", 3)
+
+    server, url = _serve(Handler)
+    try:
+        cache = FeedCache(str(tmp_path / "cache.json"))
+        items, validators = monitor._fetch_rss(url, cache, seen)
+        assert [i["id"] for i in items] == ["0", "1"]
+        # Partially read bodies never count as unchanged.
+        assert validators["digest"] == ""
+    finally:
+        server.shutdown()
+
+
+def test_send_alert_batch_maps_results(monkeypatch):
+    sent = []
+
+    def fake_post(payload, url=None):
+        sent.append(payload)
+        # Answer out of order, and fail one call, to check mapping by id.
+        out = []
+        for call in reversed(payload):
+            tx_hash = call["params"][0]["args"][1]
+            if tx_hash == "0x3":
+                out.append({"jsonrpc": "2.0", "id": call["id"], "error": {"message": "boom"}})
+            else:
+                out.append({"jsonrpc": "2.0", "id": call["id"], "result": tx_hash})
+        return out
+
+    monkeypatch.setattr(monitor, "_post_json", fake_post)
+    errors = monitor._send_alert_batch([(f"data{i}", f"0x{i}", "") for i in range(5)])
+    assert len(sent) == 1 and len(sent[0]) == 5
+    assert errors[3] is not None and [e for i, e in enumerate(errors) if i != 3] == [None] * 4
+
+    results = monitor._rpc_batch(
+        [("gen_sendTransaction", [monitor._analyze_tx_obj("d", h)]) for h in ("0x1", "0x3")]
+    )
+    assert results[0]["result"] == "0x1"
+    assert results[1]["error"]["message"] == "boom"
+
+
+def test_feed_scheduler_adapts_intervals():
+    from feed_scheduler import FeedScheduler, max_age_seconds
+
+    sched = FeedScheduler(base_interval=45, min_interval=15, max_interval=300, backoff=2, burst_alerts=2)
+    assert sched.due(["a", "b"], now=0) == ["a", "b"]
+    assert sched.due(["a", "b"], now=10) == []
+
+    assert sched.record("a", new_items=0, now=0) == 90
+    assert sched.record("a", new_items=0, now=0) == 180
+    assert sched.record("a", new_items=0, now=0) == 300
+    assert sched.record("a", new_items=3, alerts=1, now=0) == 45
+    assert sched.record("a", new_items=3, alerts=2, now=0) == 15
+
+    sched.set_hint("b", max_age_seconds("public, max-age=120"))
+    assert sched.record("b", new_items=3, alerts=5, now=0) == 120
+    sched.set_hint("b", 86400)
+    assert sched.record("b", new_items=1, now=0) == 300
+    assert sched.seconds_until_next(now=0) == 15
+
+
+def test_story_clusterer_groups_rephrased_headlines_within_window():
+    from story_clusters import StoryClusterer
+
+    stories = StoryClusterer(window_seconds=100, threshold=0.5)
+    first, is_new = stories.assign("Bridge X hacked for $40M - CoinDesk", now=0)
+    assert is_new
+    assert stories.assign("X bridge hacked, $40M stolen - Cointelegraph", now=10) == (first, False)
+    assert stories.assign("Bitcoin price rallies after ETF approval", now=20)[1] is True
+    # Matching refreshes the window; after it lapses the story is new again.
+    assert stories.assign("X Bridge hacked for $40M", now=105) == (first, False)
+    assert stories.assign("X Bridge hacked for $40M", now=300)[1] is True
+
+
+def test_dropped_story_does_not_block_a_later_stronger_report(tmp_path):
+    from pattern_mirror import PatternMirror
+    from story_clusters import StoryClusterer
+
+    stories = StoryClusterer(window_seconds=3600, threshold=0.5)
+    mirror = PatternMirror(str(tmp_path / "patterns.json"))
+
+    weak = {"title": "Bridge X hacked for $40M", "link": "https://a/1", "pub_date": ""}
+    cid, is_new = stories.assign(weak["title"], now=0)
+    assert is_new
+    assert monitor._label_clusters(stories, mirror, {cid: [(60, ["hacked"], weak)]}, 75) == []
+
+    # The weak report was dropped, so the stronger one is a new story, not a duplicate.
+    assert stories.assign("X bridge hacked, $40M stolen", now=10)[1] is True
+
+
+def test_news_needs_ai_gate_drops_weak_unmatched_headlines(tmp_path):
+    from pattern_mirror import PatternMirror
+    from story_clusters import StoryClusterer
+
+    assert monitor.SCORE_THRESHOLD < monitor.NEWS_NEEDS_AI_MIN_SCORE
+    stories = StoryClusterer(window_seconds=3600, threshold=0.5)
+    mirror = PatternMirror(str(tmp_path / "patterns.json"))
+    headline = {"title": "Protocol hacked, funds drained", "link": "https://a/1", "pub_date": ""}
+    score, hits = monitor._score_text(f"{headline['title']} {headline['link']}")
+    assert monitor.SCORE_THRESHOLD <= score < monitor.NEWS_NEEDS_AI_MIN_SCORE
+
+    cid, _ = stories.assign(headline["title"], now=0)
+    clusters = {cid: [(score, hits, headline)]}
+    assert monitor._label_clusters(stories, mirror, clusters, monitor.NEWS_NEEDS_AI_MIN_SCORE) == []
+
+    # The same alert goes through once it matches a known pattern.
+    mirror.apply([(0, "funds drained", "drain")])
+    cid, _ = stories.assign(headline["title"], now=1)
+    alerts = monitor._label_clusters(stories, mirror, {cid: [(score, hits, headline)]}, monitor.NEWS_NEEDS_AI_MIN_SCORE)
+    assert [tx_data.endswith("label=known_pattern:0") for tx_data, _, _ in alerts] == [True]
+
+
+def test_send_alert_batch_falls_back_only_when_batches_are_unsupported(monkeypatch):
+    import json as _json
+
+    posts = []
+    replies = []
+
+    def fake_post(payload, url=None):
+        posts.append(payload)
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(monitor, "_post_json", fake_post)
+    chunk = [("d1", "0x1", ""), ("d2", "0x2", "")]
+
+    # A truncated reply to a batch the server may have executed is not resent call by call.
+    replies[:] = [_json.JSONDecodeError("Unterminated string", '[{"id": 0, "res', 15)]
+    with pytest.raises(ValueError):
+        monitor._send_alert_batch(chunk)
+    assert len(posts) == 1
+
+    posts.clear()
+    replies[:] = [{"jsonrpc": "2.0", "id": None, "error": {"message": "batch requests not supported"}},
+                  {"result": "0xa"}, {"result": "0xb"}]
+    assert monitor._send_alert_batch(chunk) == [None, None]
+    assert [isinstance(p, list) for p in posts] == [True, False, False]
+
+
+def test_chain_origin_reaches_the_analyze_payload(tmp_path, monkeypatch):
+    from pattern_mirror import PatternMirror
+    from submit_queue import SubmissionQueue
+
+    sent = []
+
+    def fake_post(payload, url=None):
+        sent.extend(call["params"][0]["args"] for call in payload)
+        return [{"jsonrpc": "2.0", "id": call["id"], "result": "0xtx"} for call in payload]
+
+    monkeypatch.setattr(monitor, "_post_json", fake_post)
+    tx = {
+        "hash": "0x02", "block": 7, "from": "0x" + "33" * 20, "to": PROTOCOL,
+        "selector": "0xab9c4b5d", "value_wei": 0, "score": 80, "reasons": ["aave_flash_loan"],
+    }
+    candidates = [monitor._chain_tx_alert(tx), ("news_alert title='x'", "0x03", 80, "")]
+    alerts = monitor._label_alerts(PatternMirror(str(tmp_path / "p.json")), candidates, 40)
+    queue = SubmissionQueue(monitor._send_alert_batch, str(tmp_path / "dlq.jsonl"), workers=1, rate_per_second=0)
+    try:
+        monitor._submit_alerts(queue, alerts)
+        _wait_for(lambda: len(sent) == 2)
+    finally:
+        queue.close()
+    # Chain alerts carry their originator; news alerts keep the two-argument call.
+    assert sorted((args[1], args[2:]) for args in sent) == [("0x02", ["0x" + "33" * 20]), ("0x03", [])]
+
+
+def test_cluster_alert_merges_sources():
+    members = [
+        (70, ["hacked"], {"title": "X hacked", "link": "https://a/1", "pub_date": ""}),
+        (90, ["hacked", "bridge"], {"title": "Bridge X hacked", "link": "https://b/2", "pub_date": ""}),
+    ]
+    tx_data, tx_hash, score, origin = monitor._cluster_alert(members)
+    assert origin == ""
+    assert "title='Bridge X hacked'" in tx_data and "score=90" in tx_data
+    assert "hits=['hacked', 'bridge']" in tx_data
+    assert "sources=2 links=['https://b/2', 'https://a/1']" in tx_data
+    assert tx_hash == "0x" + monitor._hash_id("https://b/2")
+
+
+PROTOCOL = "0x" + "aa" * 20
+ATTACKER_CONTRACT = "0x" + "bb" * 20
+
+
+def _evm_stub_blocks():
+    from chain_prescreen import TRANSFER_TOPIC, address_topic
+
+    benign = {"hash": "0x01", "from": "0x" + "11" * 20, "to": "0x" + "22" * 20, "input": "0xa9059cbb", "value": "0x0"}
+    exploit = {"hash": "0x02", "from": "0x" + "33" * 20, "to": ATTACKER_CONTRACT, "input": "0xab9c4b5d00", "value": "0x0"}
+    deposit = {"hash": "0x03", "from": "0x" + "44" * 20, "to": PROTOCOL, "input": "0xb6b55f25", "value": "0x0"}
+    blocks = {
+        101: {"number": hex(101), "transactions": [benign, deposit]},
+        102: {"number": hex(102), "transactions": [exploit]},
+    }
+    drain = [
+        {"address": "0x" + "cc" * 20, "transactionHash": "0x02",
+         "topics": [TRANSFER_TOPIC, address_topic(PROTOCOL), address_topic(ATTACKER_CONTRACT)]}
+        for _ in range(6)
+    ]
+    deposit_log = [{"address": PROTOCOL, "transactionHash": "0x03", "topics": ["0x" + "00" * 32]}]
+    return blocks, drain + deposit_log
+
+
+class _EvmHandler(BaseHTTPRequestHandler):
+    head = 104
+
+    def do_POST(self):
+        import json
+
+        blocks, logs = _evm_stub_blocks()
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        def answer(call):
+            method, params = call["method"], call["params"]
+            if method == "eth_blockNumber":
+                result = hex(self.head)
+            elif method == "eth_getBlockByNumber":
+                result = blocks.get(int(params[0], 16), {"number": params[0], "transactions": []})
+            else:
+                lo, hi = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+                in_range = [l for l in logs if lo <= (102 if l["transactionHash"] == "0x02" else 101) <= hi]
+                if "address" in params[0]:
+                    result = [l for l in in_range if l["address"] in params[0]["address"]]
+                else:
+                    result = [l for l in in_range if len(l["topics"]) > 1 and l["topics"][1] in params[0]["topics"][1]]
+            return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+        out = [answer(c) for c in request] if isinstance(request, list) else answer(request)
+        body = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_chain_step_prescreens_blocks_from_json_rpc_stub(monkeypatch):
+    from chain_prescreen import ChainPrescreener
+
+    server, url = _serve(_EvmHandler)
+    try:
+        monkeypatch.setattr(monitor, "EVM_RPC_URL", url)
+        monkeypatch.setattr(monitor, "CHAIN_CONFIRMATIONS", 2)
+        screener = ChainPrescreener([PROTOCOL], threshold=40)
+
+        cursor, alerts = monitor._chain_step(screener, 100)
+        assert cursor == 102
+        assert [tx_hash for _, tx_hash, _, _ in alerts] == ["0x02"]
+        assert "aave_flash_loan" in alerts[0][0] and "protocol_outflow_burst" in alerts[0][0]
+        assert alerts[0][3] == "0x" + "33" * 20
+
+        # Caught up with the confirmed head: nothing more to do.
+        assert monitor._chain_step(screener, cursor) == (102, [])
+    finally:
+        server.shutdown()
+
+
+def test_pattern_mirror_matches_like_the_contract_and_gates_alerts(tmp_path):
+    from pattern_mirror import PatternMirror, parse_patterns
+
+    mirror = PatternMirror(str(tmp_path / "patterns.json"))
+    rows = parse_patterns(
+        '[{"pattern_id": 0, "signature": "suspicious_call", "description": "a"},'
+        ' {"pattern_id": 1, "signature": "call", "description": "b"},'
+        ' {"pattern_id": 2, "signature": "flashloan reentrancy", "description": "c"}]'
+    )
+    assert mirror.apply(rows) == 3
+    assert mirror.apply(rows) == 0
+    # The contract stops at the first stored pattern that is a substring.
+    assert mirror.match("x suspicious_call y")[0] == 0
+    assert mirror.match("recall")[0] == 1
+    assert mirror.match("SUSPICIOUS_CALL") is None
+
+    mirror.save()
+    reloaded = PatternMirror(str(tmp_path / "patterns.json"))
+    assert reloaded.max_id == 2
+    reloaded.apply([(3, "drain()", "d")])
+    assert reloaded.match("flashloan reentrancy drain()")[0] == 2
+
+    alerts = monitor._label_alerts(
+        mirror, [("has flashloan reentrancy", "0x1", 10, "0xa"), ("novel", "0x2", 90, ""), ("meh", "0x3", 10, "")], 75
+    )
+    assert alerts == [("has flashloan reentrancy label=known_pattern:2", "0x1", "0xa"), ("novel label=needs_ai", "0x2", "")]
+
+
+def test_pattern_mirror_syncs_incrementally_and_resyncs(tmp_path):
+    from pattern_mirror import PatternMirror
+
+    chain = [(i, f"sig{i}", "d") for i in range(5)]
+    reads = []
+
+    def fetch_page(start, limit):
+        reads.append((start, limit))
+        return chain[start:start + limit]
+
+    path = str(tmp_path / "patterns.json")
+    mirror = PatternMirror(path, "0xabc")
+    assert mirror.sync(fetch_page, page_size=2) == (5, False)
+    assert reads == [(0, 2), (2, 2), (4, 2)]
+    mirror.save()
+
+    chain.append((5, "sig5", "d"))
+    reads.clear()
+    mirror = PatternMirror(path, "0xabc")
+    assert mirror.sync(fetch_page, page_size=2) == (1, False)
+    # Only the cached tail and newer patterns are read.
+    assert reads == [(4, 2), (6, 2)]
+
+    chain[:] = [(0, "other0", "d"), (1, "other1", "d")]
+    assert mirror.sync(fetch_page, page_size=2) == (2, True)
+    assert sorted(mirror.patterns) == [0, 1] and mirror.patterns[1][0] == "other1"
+
+    # A cache written for another contract is ignored.
+    assert len(PatternMirror(path, "0xdef")) == 0
+
+
+def test_sync_patterns_downloads_everything_only_when_pagination_is_missing(tmp_path, monkeypatch):
+    import json as _json
+    from pattern_mirror import PatternMirror
+
+    calls = []
+    replies = {}
+
+    def fake_rpc(method, params):
+        name = params[0]["method"]
+        calls.append(name)
+        reply = replies[name]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(monitor, "_rpc_call", fake_rpc)
+    mirror = PatternMirror(str(tmp_path / "patterns.json"), "0xabc")
+    replies["get_attack_patterns"] = {"result": [{"pattern_id": 0, "signature": "sig0", "description": "d"}]}
+
+    for transient in (
+        {"error": {"code": -32000, "message": "node overloaded"}},
+        _json.JSONDecodeError("Expecting value", "<html>", 0),
+        TimeoutError("timed out"),
+    ):
+        replies["get_attack_patterns_from"] = transient
+        calls.clear()
+        monitor._sync_patterns(mirror)
+        assert calls == ["get_attack_patterns_from"] and len(mirror) == 0
+
+    replies["get_attack_patterns_from"] = {"error": {"code": -32601, "message": "Method not found"}}
+    calls.clear()
+    monitor._sync_patterns(mirror)
+    assert calls == ["get_attack_patterns_from", "get_attack_patterns"] and len(mirror) == 1
+
+
+def test_aho_corasick_scales_to_many_signatures():
+    from pattern_mirror import AhoCorasick
+
+    ac = AhoCorasick()
+    for i in range(10000):
+        ac.add(f"sig{i:05d}x", i)
+    assert sorted(ac.iter_matches("..sig00042x..sig09999x..sig1")) == [42, 9999]
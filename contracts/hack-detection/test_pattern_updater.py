@@ -0,0 +1,256 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pattern_updater
+from feed_cache import FeedCache
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(2.0 if self.path == "/slow" else 0.1)
+            body = b"flash loan reentrancy drain|Imported|90\n"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_fetch_feeds_respects_per_host_cap_and_deadline(monkeypatch, tmp_path):
+    monkeypatch.setattr(pattern_updater, "PATTERN_FETCH_WORKERS", 8)
+    monkeypatch.setattr(pattern_updater, "PATTERN_FETCH_PER_HOST", 2)
+    server, base = _serve()
+    try:
+        urls = [f"{base}/feed{i}" for i in range(6)] + [f"{base}/slow"]
+        started = time.monotonic()
+        deadline = started + 1.0
+        selection = pattern_updater._Selection(re.compile(pattern_updater.PATTERN_SIGNATURE_REGEX), set, 10)
+        cache = FeedCache(str(tmp_path / "cache.json"))
+
+        def handle(url):
+            return pattern_updater._stream_feed(url, deadline, selection, cache)
+
+        results = {url: (count, err) for url, count, _, err in pattern_updater._fetch_feeds(urls, deadline, handle)}
+        assert time.monotonic() - started < 1.8
+        assert _FeedHandler.peak <= 2
+        assert set(results) == set(urls)
+        ok = [url for url, (count, err) in results.items() if err is None]
+        assert f"{base}/slow" not in ok and len(ok) >= 4
+        assert all(results[url][0][0] == 1 for url in ok)
+        assert [sig for _, sig, _ in selection.close()] == ["flash loan reentrancy drain"]
+    finally:
+        server.shutdown()
+
+
+def test_streaming_extraction_keeps_top_candidates(monkeypatch):
+    from pattern_stream import iter_records
+
+    monkeypatch.setattr(pattern_updater, "PATTERN_MIN_CONFIDENCE", 70)
+    feed = json.dumps({
+        "source": "intel",
+        "patterns": [{"signature": f"exploit sig {i}", "confidence": 60 + i} for i in range(40)]
+        + ["exploit sig 39", {"ioc": "bad!!sig"}],
+    })
+    chunks = [feed[i:i + 7] for i in range(0, len(feed), 7)]
+    selection = pattern_updater._Selection(
+        re.compile(pattern_updater.PATTERN_SIGNATURE_REGEX), lambda: {"exploit sig 38"}, 3
+    )
+    for record in iter_records(chunks, "application/json"):
+        selection.offer(record)
+    assert selection.close() == [
+        (99, "exploit sig 39", "Imported from feed"),
+        (97, "exploit sig 37", "Imported from feed"),
+        (96, "exploit sig 36", "Imported from feed"),
+    ]
+
+    lines = "# comment\nflash loan drain|Oracle abuse|80\nplain signature\n[oops] not json|x|90"
+    records = list(iter_records([lines[i:i + 5] for i in range(0, len(lines), 5)]))
+    assert [r["signature"] for r in records] == ["flash loan drain", "plain signature", "[oops] not json"]
+    assert records[2]["confidence"] == 90
+
+
+def test_submit_patterns_batches_and_falls_back(monkeypatch):
+    calls = []
+
+    def fake_rpc(method, params):
+        call = params[0]
+        calls.append((call["method"], call["args"]))
+        if call["method"] == "add_attack_patterns" and len(call["args"][0]) == 1:
+            return {"error": {"message": "unknown method"}}
+        return {"result": "0xtx"}
+
+    monkeypatch.setattr(pattern_updater, "_rpc_call", fake_rpc)
+    monkeypatch.setattr(pattern_updater, "PATTERN_SUBMIT_BATCH_SIZE", 2)
+    pattern_updater._submit_patterns([(90, "a sig", "A"), (80, "b sig", "B"), (70, "c sig", "C")])
+    assert calls == [
+        ("add_attack_patterns", [[["a sig", "A"], ["b sig", "B"]]]),
+        ("add_attack_patterns", [[["c sig", "C"]]]),
+        ("add_attack_pattern", ["c sig", "C"]),
+    ]
+
+
+def test_submit_patterns_rereads_chain_after_a_timeout(monkeypatch):
+    calls = []
+    onchain = set()
+
+    def fake_rpc(method, params):
+        call = params[0]
+        calls.append((call["method"], call["args"]))
+        if len(calls) == 1:
+            # The first batch lands, but its reply never arrives.
+            onchain.add("a sig")
+            raise TimeoutError("timed out")
+        return {"result": "0xtx"}
+
+    monkeypatch.setattr(pattern_updater, "_rpc_call", fake_rpc)
+    monkeypatch.setattr(pattern_updater, "_get_onchain_signatures", lambda strict=False: set(onchain))
+    submitted = pattern_updater._submit_patterns([(90, "a sig", "A"), (80, "b sig", "B")])
+    assert submitted == {"a sig", "b sig"}
+    # Only the missing pattern is resent, and never through the per-pattern fallback.
+    assert calls == [
+        ("add_attack_patterns", [[["a sig", "A"], ["b sig", "B"]]]),
+        ("add_attack_patterns", [[["b sig", "B"]]]),
+    ]
+
+
+def test_submit_patterns_does_not_resend_when_chain_is_unreadable(monkeypatch):
+    calls = []
+
+    def fake_rpc(method, params):
+        calls.append(params[0]["method"])
+        raise TimeoutError("timed out")
+
+    def unreadable(strict=False):
+        raise ConnectionError("node down")
+
+    monkeypatch.setattr(pattern_updater, "_rpc_call", fake_rpc)
+    monkeypatch.setattr(pattern_updater, "_get_onchain_signatures", unreadable)
+    assert pattern_updater._submit_patterns([(90, "a sig", "A"), (80, "b sig", "B")]) == set()
+    assert calls == ["add_attack_patterns"]
+
+
+def test_onchain_signatures_fall_back_only_when_pagination_is_missing(monkeypatch, tmp_path):
+    calls = []
+    paged = {}
+
+    def fake_rpc(method, params):
+        name = params[0]["method"]
+        calls.append(name)
+        if name == "get_attack_patterns":
+            return {"result": [{"pattern_id": 0, "signature": "Flash Loan Drain", "description": "d"}]}
+        return paged["reply"]
+
+    monkeypatch.setattr(pattern_updater, "_rpc_call", fake_rpc)
+    monkeypatch.setattr(pattern_updater, "PATTERN_CACHE_FILE", str(tmp_path / "onchain.json"))
+
+    paged["reply"] = {"error": {"code": -32000, "message": "execution reverted"}}
+    assert pattern_updater._get_onchain_signatures() == set()
+    assert calls == ["get_attack_patterns_from"]
+
+    calls.clear()
+    paged["reply"] = {"error": "contract has no method get_attack_patterns_from: method not found"}
+    assert pattern_updater._get_onchain_signatures() == {"flash loan drain"}
+    assert calls == ["get_attack_patterns_from", "get_attack_patterns"]
+
+
+class _CachedFeedHandler(BaseHTTPRequestHandler):
+    body = b"flash loan drain one|A|90\nflash loan drain two|B|80\n"
+    etag = '"v1"'
+
+    def do_GET(self):
+        cls = type(self)
+        if self.path == "/etag" and self.headers.get("If-None-Match") == cls.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.path == "/etag":
+            self.send_header("ETag", cls.etag)
+        self.send_header("Content-Length", str(len(cls.body)))
+        self.end_headers()
+        self.wfile.write(cls.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_unchanged_feeds_are_skipped_once_consumed(monkeypatch, tmp_path, capsys):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CachedFeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    onchain_reads = []
+    writes = []
+
+    def fake_onchain():
+        onchain_reads.append(1)
+        return set()
+
+    def fake_rpc(method, params):
+        writes.append(params[0]["args"])
+        return {"result": "0xtx"}
+
+    monkeypatch.setattr(pattern_updater, "CONTRACT_ADDRESS", "0xabc")
+    monkeypatch.setattr(pattern_updater, "PATTERN_FEED_URLS", [f"{base}/etag", f"{base}/plain"])
+    monkeypatch.setattr(pattern_updater, "PATTERN_FEED_CACHE_FILE", str(tmp_path / "feeds.json"))
+    monkeypatch.setattr(pattern_updater, "PATTERN_DRY_RUN", False)
+    monkeypatch.setattr(pattern_updater, "PATTERN_MAX_PER_RUN", 1)
+    monkeypatch.setattr(pattern_updater, "_get_onchain_signatures", fake_onchain)
+    monkeypatch.setattr(pattern_updater, "_rpc_call", fake_rpc)
+    compiled = re.compile(pattern_updater.PATTERN_SIGNATURE_REGEX)
+    try:
+        # Only one of the two candidates fits, so neither feed is cached yet.
+        pattern_updater._run_once(compiled)
+        assert writes == [[[["flash loan drain one", "A"]]]]
+        assert "Feed cache: 0 hits, 2 misses" in capsys.readouterr().out
+
+        monkeypatch.setattr(pattern_updater, "PATTERN_MAX_PER_RUN", 10)
+        pattern_updater._run_once(compiled)
+        assert len(writes) == 2
+        assert "Feed cache: 0 hits, 2 misses" in capsys.readouterr().out
+
+        onchain_reads.clear()
+        pattern_updater._run_once(compiled)
+        out = capsys.readouterr().out
+        assert "Feed cache: 2 hits, 0 misses" in out and "unchanged" in out
+        assert onchain_reads == [] and len(writes) == 2
+    finally:
+        server.shutdown()
+
+
+def test_selection_rejects_and_merges_near_duplicates(monkeypatch):
+    monkeypatch.setattr(pattern_updater, "PATTERN_MIN_CONFIDENCE", 0)
+    selection = pattern_updater._Selection(
+        re.compile(pattern_updater.PATTERN_SIGNATURE_REGEX), lambda: {"flash loan oracle manipulation"}, 5, 0.8
+    )
+    for sig, conf in [
+        ("oracle manipulation, flash loan", 90),
+        ("vault withdraw reentrancy", 70),
+        ("reentrancy: vault withdraw()", 85),
+        ("vault withdraw re-entrancy", 60),
+    ]:
+        selection.offer({"signature": sig, "confidence": conf}, "feed")
+    assert [(conf, sig) for conf, sig, _ in selection.close()] == [(85, "reentrancy: vault withdraw()")]
@@ -0,0 +1,34 @@
+import random
+
+from signature_index import SignatureIndex, canonical_signature, similar
+
+
+def test_canonical_form_ignores_order_punctuation_and_addresses():
+    assert canonical_signature("Drain(transfer, FROM)") == canonical_signature("from transfer drain")
+    assert canonical_signature("router exploit 0x" + "ab" * 20) == canonical_signature("router exploit")
+    assert canonical_signature("0x" + "ab" * 20) == ""
+
+
+def test_index_finds_near_duplicates():
+    index = SignatureIndex(
+        ["reentrancy in vault withdraw()", "flash loan price oracle manipulation", "bridge validator key compromise"]
+    )
+    assert index.find("re-entrancy in vault withdraw") == ("reentrancy in vault withdraw()", 1.0)
+    assert index.find("withdraw() in vault: reentrancy 0x" + "12" * 20)[0] == "reentrancy in vault withdraw()"
+    hit = index.find("flash loan price oracle manipulations")
+    assert hit is not None and hit[0] == "flash loan price oracle manipulation" and hit[1] >= 0.8
+    assert index.find("flash loan governance takeover") is None
+    assert similar("approve frontrun", "frontrun approve")
+    assert not similar("approve frontrun", "permit replay")
+
+
+def test_index_matches_brute_force_on_many_signatures():
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(300)]
+    known = [" ".join(rng.sample(vocab, rng.randint(3, 8))) for _ in range(1000)]
+    index = SignatureIndex(known)
+    for _ in range(100):
+        base = rng.choice(known).split()
+        query = " ".join(base + [rng.choice(vocab)] if rng.random() < 0.5 else rng.sample(vocab, 5))
+        expected = any(similar(query, k) for k in known)
+        assert (index.find(query) is not None) == expected
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+
+from submit_queue import SubmissionQueue
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_retries_with_backoff_then_succeeds(tmp_path):
+    calls = []
+    lock = threading.Lock()
+
+    def send(batch):
+        with lock:
+            calls.append([h for _, h, _ in batch])
+            # The first attempt at 0xbad fails, everything else goes through.
+            first_try = sum(c.count("0xbad") for c in calls) == 1
+        return ["rpc down" if h == "0xbad" and first_try else None for _, h, _ in batch]
+
+    events = []
+    queue = SubmissionQueue(
+        send, str(tmp_path / "dlq.jsonl"), workers=1, batch_size=10,
+        backoff_seconds=0.05, rate_per_second=0, on_event=events.append,
+    )
+    try:
+        queue.put("a", "0xok")
+        queue.put("b", "0xbad")
+        assert _wait_for(lambda: events.count("sent") == 2)
+        assert events.count("retry") == 1
+        assert queue.depth() == 0
+        assert not os.path.exists(tmp_path / "dlq.jsonl")
+    finally:
+        queue.close()
+
+
+def test_dead_letter_and_replay(tmp_path):
+    dlq = tmp_path / "dlq.jsonl"
+    events = []
+    failing = SubmissionQueue(
+        lambda batch: ["boom"] * len(batch), str(dlq), workers=1,
+        max_attempts=2, backoff_seconds=0.01, rate_per_second=0, on_event=events.append,
+    )
+    try:
+        failing.put("data", "0x1")
+        assert _wait_for(lambda: "dead_letter" in events)
+    finally:
+        failing.close()
+    rows = [json.loads(line) for line in dlq.read_text().splitlines()]
+    assert [(r["tx_hash"], r["attempts"], r["error"]) for r in rows] == [("0x1", 2, "boom")]
+
+    delivered = []
+    healthy = SubmissionQueue(lambda batch: delivered.extend(batch) or [None] * len(batch), str(dlq), workers=1, rate_per_second=0)
+    try:
+        assert healthy.replay_dead_letters() == 1
+        assert _wait_for(lambda: delivered == [("data", "0x1", "")])
+        assert _wait_for(lambda: not os.path.exists(f"{dlq}.replay"))
+        assert not dlq.exists()
+    finally:
+        healthy.close()
+
+
+def test_close_spools_pending_alerts(tmp_path):
+    dlq = tmp_path / "dlq.jsonl"
+    queue = SubmissionQueue(
+        lambda batch: ["down"] * len(batch), str(dlq), workers=1,
+        backoff_seconds=60, rate_per_second=0,
+    )
+    queue.put("data", "0x1")
+    assert _wait_for(lambda: queue.depth() == 1 and not queue._active)
+    queue.close()
+    assert [json.loads(line)["tx_hash"] for line in dlq.read_text().splitlines()] == ["0x1"]
+    assert queue.put("late", "0x2") is False
+
+
+def test_close_spools_in_flight_and_throttled_batches(tmp_path):
+    dlq = tmp_path / "dlq.jsonl"
+    release = threading.Event()
+    started = threading.Event()
+
+    def stuck(batch):
+        started.set()
+        release.wait(5)
+        return [None] * len(batch)
+
+    queue = SubmissionQueue(stuck, str(dlq), workers=1, batch_size=1, rate_per_second=0)
+    queue.put("data", "0x1")
+    assert started.wait(5)
+    queue.close(timeout=0.1)
+    release.set()
+    # The late reply does not resolve the alert a second time.
+    time.sleep(0.05)
+    assert [json.loads(line)["tx_hash"] for line in dlq.read_text().splitlines()] == ["0x1"]
+
+    dlq.unlink()
+    sent = []
+    throttled = SubmissionQueue(
+        lambda batch: sent.extend(batch) or [None] * len(batch), str(dlq), workers=1, batch_size=1, rate_per_second=0.5,
+    )
+    throttled.put("data", "0x2")
+    throttled.put("data", "0x3")
+    assert _wait_for(lambda: len(sent) == 1)
+    begun = time.monotonic()
+    throttled.close()
+    assert time.monotonic() - begun < 1
+    assert sent == [("data", "0x2", "")]
+    assert [json.loads(line)["tx_hash"] for line in dlq.read_text().splitlines()] == ["0x3"]
+
+
+def test_permanent_errors_are_not_retried(tmp_path):
+    dlq = tmp_path / "dlq.jsonl"
+    calls = []
+    events = []
+
+    def send(batch):
+        calls.append(batch)
+        return ["UserError: Contract is paused" if tx_hash == "0x1" else None for _, tx_hash, _ in batch]
+
+    queue = SubmissionQueue(send, str(dlq), workers=1, backoff_seconds=0.01, rate_per_second=0, on_event=events.append)
+    try:
+        queue.put("data", "0x1")
+        queue.put("data", "0x2")
+        assert _wait_for(lambda: events.count("dead_letter") == 1 and events.count("sent") == 1)
+        time.sleep(0.05)
+    finally:
+        queue.close()
+    assert "retry" not in events
+    assert sum(len(batch) for batch in calls) == 2
+    rows = [json.loads(line) for line in dlq.read_text().splitlines()]
+    assert [(r["tx_hash"], r["attempts"]) for r in rows] == [("0x1", 1)]